@@ -24,7 +24,7 @@ import logging
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 
 from config import Config
 
@@ -1558,14 +1558,23 @@ def _parse_single_file(path: Path) -> List[Chunk]:
     return chunks
 
 
-def _parse_directory(docs_root: Path) -> List[Chunk]:
+def iter_chunks(path: Path = Config.DOCS_FILE) -> Iterator[Chunk]:
     """
-    Parse all markdown files in a directory tree.
-    
-    Each file becomes a logical "document" with its own chunks.
-    Links are resolved relative to each file's location.
+    Streaming counterpart of `parse_file`.
+
+    Yields chunks file by file, so only one parsed document is held in
+    memory at a time. Used by the ingestion scripts.
     """
-    all_chunks: List[Chunk] = []
+    if path.is_file():
+        yield from _parse_single_file(path)
+    elif path.is_dir():
+        yield from _iter_directory(path)
+    else:
+        log.error(f"Path not found: {path}")
+
+
+def _iter_directory(docs_root: Path) -> Iterator[Chunk]:
+    """Yield chunks for every markdown file under `docs_root`, in path order."""
     md_files = list(docs_root.rglob("*.md")) + list(docs_root.rglob("*.mdx"))
     
     log.info(f"Found {len(md_files)} markdown files in {docs_root}")
@@ -1576,10 +1585,18 @@ def _parse_directory(docs_root: Path) -> List[Chunk]:
             log.debug(f"Skipping archive/draft: {file_path}")
             continue
         
-        chunks = _parse_file_with_metadata(file_path, docs_root)
-        all_chunks.extend(chunks)
+        yield from _parse_file_with_metadata(file_path, docs_root)
+
+
+def _parse_directory(docs_root: Path) -> List[Chunk]:
+    """
+    Parse all markdown files in a directory tree.
     
-    log.info(f"Total: {len(all_chunks)} chunks from {len(md_files)} files")
+    Each file becomes a logical "document" with its own chunks.
+    Links are resolved relative to each file's location.
+    """
+    all_chunks = list(_iter_directory(docs_root))
+    log.info(f"Total: {len(all_chunks)} chunks from {docs_root}")
     return all_chunks
 
 
@@ -26,6 +26,13 @@ class Config:
     # ── Qdrant ────────────────────────────────────────────────────────────
     QDRANT_URL: str = os.getenv("QDRANT_URL", "./qdrant_db")
     QDRANT_API_KEY: str | None = os.getenv("QDRANT_API_KEY")   # required for Qdrant Cloud
+    QDRANT_PREFER_GRPC: bool = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"   # port 6334
+
+    QDRANT_QUANTIZATION: str = os.getenv("QDRANT_QUANTIZATION", "int8")   # "int8" | "binary" | "none"
+    QDRANT_OVERSAMPLING: float = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))   # candidates rescored per result
+    QDRANT_HNSW_M: int = int(os.getenv("QDRANT_HNSW_M", "24"))                        # graph degree (new collections)
+    QDRANT_HNSW_EF_CONSTRUCT: int = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "128"))  # build beam (new collections)
+    QDRANT_EF_SEARCH: int = int(os.getenv("QDRANT_EF_SEARCH", "100"))                  # query beam
 
     DOCS_COLLECTION: str = os.getenv("DOCS_COLLECTION", "olake_docs")
     CODE_COLLECTION: str = os.getenv("CODE_COLLECTION", "olake_code")
@@ -33,7 +40,14 @@ class Config:
     # ── Embedding ─────────────────────────────────────────────────────────
     EMBED_MODEL: str = os.getenv("EMBED_MODEL", "nomic-ai/nomic-embed-text-v1.5")
     EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "64"))
-    EMBED_DEVICE: str = os.getenv("EMBED_DEVICE", "cpu")   # "cuda" on GPU hosts
+    EMBED_DEVICE: str = os.getenv("EMBED_DEVICE", "auto")  # "auto" | "cuda" | "mps" | "cpu"
+    EMBED_QUANTIZE: str = os.getenv("EMBED_QUANTIZE", "none")   # "int8" | "bf16" | "none" (CPU ingestion only)
+    EMBED_BACKEND: str = os.getenv("EMBED_BACKEND", "torch")    # "torch" | "onnx" (ingestion + server)
+    EMBED_COMPILE: bool = os.getenv("EMBED_COMPILE", "false").lower() == "true"   # torch.compile (ingestion scripts)
+    EMBED_ONNX_DIR: str = os.getenv("EMBED_ONNX_DIR", "./.onnx_models")
+    EMBED_CACHE_PATH: str = os.getenv("EMBED_CACHE_PATH", "./.embed_cache.db")   # "" disables
+    QUERY_EMBED_CACHE_SIZE: int = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "4096"))   # 0 disables (server)
+    QUERY_EMBED_CACHE_TTL: float = float(os.getenv("QUERY_EMBED_CACHE_TTL", "3600"))  # seconds
 
     # ── Chunking ──────────────────────────────────────────────────────────
     MAX_CHUNK_CHARS: int = int(os.getenv("MAX_CHUNK_CHARS", "2500"))
@@ -43,6 +57,12 @@ class Config:
     DOC_RELEVANCE_THRESHOLD: float = float(os.getenv("DOC_RELEVANCE_THRESHOLD", "0.35"))
     MAX_RETRIEVED_DOCS: int = int(os.getenv("MAX_RETRIEVED_DOCS", "6"))
     RRF_K: int = int(os.getenv("RRF_K", "10"))
+    QUERY_CACHE_SIZE: int = int(os.getenv("QUERY_CACHE_SIZE", "2000"))   # 0 disables the result cache
+    QUERY_CACHE_TTL: float = float(os.getenv("QUERY_CACHE_TTL", "300"))  # seconds
+    RERANK_BACKEND: str = os.getenv("RERANK_BACKEND", "onnx")   # "onnx" (INT8, falls back) | "torch"
+    RERANK_WORKER: bool = os.getenv("RERANK_WORKER", "false").lower() == "true"   # dedicated batching process
+    RERANK_BATCH_WINDOW_MS: float = float(os.getenv("RERANK_BATCH_WINDOW_MS", "5"))
+    RERANK_MAX_BATCH: int = int(os.getenv("RERANK_MAX_BATCH", "128"))   # pairs per coalesced forward
 
     # ── Docs source ───────────────────────────────────────────────────────
     DOCS_FILE: Path = Path(os.getenv("DOCS_FILE", "./docs/olake_docs.md"))
@@ -51,3 +71,4 @@ class Config:
     HOST: str = os.getenv("RAG_HOST", "0.0.0.0")
     PORT: int = int(os.getenv("RAG_PORT", "7070"))
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    INGEST_CONCURRENCY: int = int(os.getenv("RAG_INGEST_CONCURRENCY", "4"))   # /api/ingest batch workers
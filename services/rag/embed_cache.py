@@ -0,0 +1,131 @@
+"""
+Embedding caches.
+
+EmbeddingCache (ingestion): maps blake2b(model + variant + text) → dense
+float32 vector in a local SQLite file so re-runs, resumed runs and duplicate chunks
+(repeated snippets, boilerplate) skip the model forward entirely.
+The variant tags backend and precision (e.g. "torch-int8", "onnx-fp32"),
+so vectors from differently quantized models never mix in one file.
+Storage: one row per text, vector stored as raw float32 bytes.
+SQLite runs in WAL mode with synchronous=NORMAL; inserts are committed in
+batches of `commit_every`, and `flush()`/`close()` commit the remainder.
+
+LRUEmbeddingCache (serving): in-memory LRU + TTL cache of query vectors, so
+recurring questions skip the query forward pass. It shares its LRU/TTL store
+with the retrieval-result cache (query_cache.LRUTTLCache).
+"""
+
+from __future__ import annotations
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from config import Config
+from query_cache import LRUTTLCache
+
+log = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """SQLite-backed text → vector cache. Safe to share across threads."""
+
+    def __init__(
+        self,
+        path: str = Config.EMBED_CACHE_PATH,
+        model_name: str = Config.EMBED_MODEL,
+        commit_every: int = 100,
+        variant: str = "",
+    ):
+        self.path = path
+        self._model_key = f"{model_name}\0{variant}\0".encode("utf-8")
+        self._commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash BLOB PRIMARY KEY, dim INT, vec BLOB)"
+        )
+        self._conn.commit()
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(self._model_key + text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached float32 vector for `text`, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dim, vec FROM embeddings WHERE hash = ?", (self._key(text),)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return np.frombuffer(row[1], dtype=np.float32)
+
+    def put(self, text: str, vector: Sequence[float]) -> None:
+        """Store a vector for `text` (no-op if already present)."""
+        arr = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO embeddings (hash, dim, vec) VALUES (?, ?, ?)",
+                (self._key(text), int(arr.size), arr.tobytes()),
+            )
+            self._pending += 1
+            if self._pending >= self._commit_every:
+                self._conn.commit()
+                self._pending = 0
+
+    def flush(self) -> None:
+        """Commit any buffered inserts."""
+        with self._lock:
+            if self._pending:
+                self._conn.commit()
+                self._pending = 0
+
+    def close(self) -> None:
+        """Commit and close the underlying connection."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+        log.info(f"Embedding cache closed ({self.hits} hits, {self.misses} misses)")
+
+
+class LRUEmbeddingCache(LRUTTLCache):
+    """
+    In-memory text → vector cache with LRU eviction and per-entry TTL.
+
+    Keys include the model name and task prefix, so query and document
+    vectors never collide. Vectors are stored as returned by the embedder
+    and shared between callers (treat them as read-only).
+    """
+
+    def __init__(
+        self,
+        capacity: int = Config.QUERY_EMBED_CACHE_SIZE,
+        ttl: float = Config.QUERY_EMBED_CACHE_TTL,
+        model_name: str = Config.EMBED_MODEL,
+    ):
+        super().__init__(capacity, ttl)
+        self._model_key = model_name.encode("utf-8") + b"\0"
+
+    def _key(self, prefix: str, text: str) -> bytes:
+        return hashlib.blake2b(self._model_key + (prefix + text).encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, prefix: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vector per text (None for misses and expired entries)."""
+        with self._lock:
+            return [self.get(self._key(prefix, text)) for text in texts]
+
+    def put_many(self, prefix: str, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        with self._lock:
+            for text, vec in zip(texts, vectors):
+                self.put(self._key(prefix, text), vec)
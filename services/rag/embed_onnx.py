@@ -0,0 +1,116 @@
+"""
+ONNX Runtime backend for the embedders and the reranker.
+
+Exports the embedding model to ONNX once (cached under EMBED_ONNX_DIR),
+optionally quantizes it to dynamic INT8, and runs it through onnxruntime's
+CPUExecutionProvider with all graph optimizations enabled (LayerNorm, GELU and
+attention fusion). The returned model accepts tokenizer output and exposes
+`last_hidden_state`, so the existing mean pooling + L2 normalization code is
+used unchanged.
+
+`load_onnx_reranker` does the same for the cross-encoder (sequence
+classification head, always INT8, multi-threaded session for serving).
+
+Requires `optimum[onnxruntime]`. When it is missing, or the export fails,
+the loaders return None and callers fall back to PyTorch.
+"""
+
+from __future__ import annotations
+import logging
+import os
+from pathlib import Path
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+_FP32_FILE = "model.onnx"
+_INT8_FILE = "model_quantized.onnx"
+
+
+def _session_options(threads: int = 1):
+    """Fully optimized ORT session; single-threaded by default (the ingest contract)."""
+    import onnxruntime as ort
+
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    so.intra_op_num_threads = threads
+    so.inter_op_num_threads = 1
+    return so
+
+
+def _export(model_cls, model_name: str, out_dir: Path, quantize: bool) -> None:
+    """Export the HF model to ONNX and optionally write an INT8 sibling."""
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    log.info(f"Exporting {model_name} to ONNX at {out_dir}")
+    model = model_cls.from_pretrained(
+        model_name,
+        export=True,
+        trust_remote_code=True,
+        provider="CPUExecutionProvider",
+    )
+    model.save_pretrained(out_dir)
+
+    if quantize:
+        log.info("Quantizing ONNX model to dynamic INT8")
+        quantizer = ORTQuantizer.from_pretrained(out_dir, file_name=_FP32_FILE)
+        quantizer.quantize(
+            save_dir=out_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False),
+        )
+
+
+def _load(model_cls, model_name: str, quantize: bool, threads: int):
+    """Load (exporting on first use) an ORT model from EMBED_ONNX_DIR."""
+    out_dir = Path(Config.EMBED_ONNX_DIR) / model_name.replace("/", "__")
+    if not (out_dir / _FP32_FILE).exists() or (quantize and not (out_dir / _INT8_FILE).exists()):
+        _export(model_cls, model_name, out_dir, quantize)
+
+    file_name = _INT8_FILE if quantize else _FP32_FILE
+    model = model_cls.from_pretrained(
+        out_dir,
+        file_name=file_name,
+        provider="CPUExecutionProvider",
+        session_options=_session_options(threads),
+    )
+    log.info(f"ONNX Runtime model loaded: {model_name} ({file_name})")
+    return model
+
+
+def load_onnx_model(model_name: str = Config.EMBED_MODEL, threads: int = 1):
+    """
+    Load (exporting on first use) an ORT feature-extraction model.
+
+    Uses the INT8 graph when EMBED_QUANTIZE=int8, otherwise FP32. Ingestion
+    keeps the single-threaded default; the server passes os.cpu_count().
+    Returns None if optimum/onnxruntime are unavailable or export fails.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        return _load(ORTModelForFeatureExtraction, model_name, Config.EMBED_QUANTIZE.lower() == "int8", threads)
+    except ImportError:
+        log.warning("optimum[onnxruntime] not installed — using PyTorch backend")
+    except Exception as e:
+        log.warning(f"ONNX export/load failed: {e} — using PyTorch backend")
+    return None
+
+
+def load_onnx_reranker(model_name: str):
+    """
+    Load (exporting on first use) an INT8 ORT sequence-classification model.
+
+    The session uses all cores, since reranking runs on the request path.
+    Returns None if optimum/onnxruntime are unavailable or export fails.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+
+        return _load(ORTModelForSequenceClassification, model_name, True, os.cpu_count() or 1)
+    except ImportError:
+        log.warning("optimum[onnxruntime] not installed — using PyTorch cross-encoder")
+    except Exception as e:
+        log.warning(f"ONNX reranker export/load failed: {e} — using PyTorch cross-encoder")
+    return None
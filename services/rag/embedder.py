@@ -3,11 +3,15 @@ Local embedding using nomic-embed-text-v1.5 via transformers.
 
 Uses AutoModel + AutoTokenizer with mean pooling + L2 normalization.
 Prefix all text with "search_document: " before embedding.
-No sentence-transformers, no fastembed.
+No sentence-transformers, no fastembed. With EMBED_BACKEND=onnx the model
+runs as an ONNX Runtime graph (INT8 when EMBED_QUANTIZE=int8), falling back
+to PyTorch if optimum is unavailable.
 """
 
 from __future__ import annotations
 import logging
+import os
+from contextlib import AbstractContextManager, nullcontext
 from functools import lru_cache
 from typing import List
 
@@ -15,12 +19,28 @@ import torch
 from transformers import AutoModel, AutoTokenizer
 
 from config import Config
+from embed_cache import EmbeddingCache, LRUEmbeddingCache
 
 log = logging.getLogger(__name__)
 
 _INDEX_PREFIX = "search_document: "
 _QUERY_PREFIX = "search_query: "
 
+# Recurring questions skip the query forward pass
+_QUERY_CACHE = LRUEmbeddingCache()
+
+
+@lru_cache(maxsize=1)
+def _doc_cache() -> EmbeddingCache | None:
+    """
+    Persistent document-vector cache ("" disables). The file is shared with the
+    ingestion scripts, but entries are keyed by this model's precision tag, so
+    the server only ever reads back vectors its own model produced.
+    """
+    if not Config.EMBED_CACHE_PATH:
+        return None
+    return EmbeddingCache(Config.EMBED_CACHE_PATH, variant=precision_tag(_get_model()[0]))
+
 
 @lru_cache(maxsize=1)
 def _get_model():
@@ -31,16 +51,125 @@ def _get_model():
         local_files_only=True,
         trust_remote_code=True,
     )
-    model = AutoModel.from_pretrained(
-        Config.EMBED_MODEL,
-        local_files_only=True,
-        trust_remote_code=True,
-    )
-    model.eval()
+    model = None
+    if Config.EMBED_BACKEND == "onnx":
+        from embed_onnx import load_onnx_model
+        # Queries are embedded on the request path, so use every core
+        model = load_onnx_model(Config.EMBED_MODEL, threads=os.cpu_count() or 1)
+    if model is None:
+        model = AutoModel.from_pretrained(
+            Config.EMBED_MODEL,
+            local_files_only=True,
+            trust_remote_code=True,
+        )
+        model.eval()
     log.info("Embedding model loaded ✓")
     return model, tokenizer
 
 
+def select_device(preferred: str = Config.EMBED_DEVICE) -> str:
+    """Resolve EMBED_DEVICE; "auto" picks cuda, then mps, then cpu."""
+    if preferred != "auto":
+        return preferred
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def quantize_model(model, device: str = "cpu"):
+    """
+    Reduce the precision of a loaded model for CPU inference.
+
+    EMBED_QUANTIZE=int8 applies dynamic INT8 quantization to the Linear layers
+    (weights quantized once at load, activations per forward). Only the
+    ingestion scripts call this; PyTorch query embedding stays FP32, so the
+    default is none and int8/bf16 should only be enabled after checking
+    recall against the FP32 baseline. GPU/MPS models are returned unchanged.
+    """
+    mode = Config.EMBED_QUANTIZE.lower()
+    if device != "cpu" or mode == "none":
+        return model
+    if mode == "bf16":
+        log.info("Casting embedding model to bfloat16")
+        return model.to(torch.bfloat16)
+    log.info("Applying dynamic INT8 quantization to Linear layers")
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def precision_tag(model) -> str:
+    """
+    Backend + precision of a loaded embedding model, e.g. "torch-int8".
+
+    Used as the EmbeddingCache variant so a cache file shared by the server
+    and the ingestion scripts never serves vectors from another precision.
+    """
+    if not isinstance(model, torch.nn.Module):
+        return "onnx-int8" if Config.EMBED_QUANTIZE.lower() == "int8" else "onnx-fp32"
+    if any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in model.modules()):
+        return "torch-int8"
+    return "torch-bf16" if next(model.parameters()).dtype == torch.bfloat16 else "torch-fp32"
+
+
+def compile_model(model, enabled: bool = Config.EMBED_COMPILE):
+    """
+    Wrap a PyTorch model with torch.compile (TorchInductor, dynamic shapes).
+
+    Compilation is lazy, so failures surface on the first forward; use
+    `warmup_model`, which falls back to the eager model in that case.
+    On CUDA, mode="reduce-overhead" also captures CUDA graphs.
+    """
+    if not enabled or not hasattr(torch, "compile"):
+        return model
+    log.info("Compiling embedding model with torch.compile")
+    return torch.compile(model, mode="reduce-overhead", dynamic=True, fullgraph=False)
+
+
+def warmup_model(model, tokenizer, prefix_ids: torch.Tensor, device: str = "cpu", runs: int = 2):
+    """
+    Run a few dummy forwards so the first real chunk doesn't pay kernel
+    selection, allocator growth or compilation cost. Returns the model to use.
+    """
+    encoded = encode_prefixed(tokenizer, "warmup " * 64, prefix_ids, device)
+    try:
+        with torch.inference_mode():
+            for _ in range(runs):
+                model(**encoded)
+    except Exception as e:
+        eager = getattr(model, "_orig_mod", None)
+        if eager is None:
+            raise
+        log.warning(f"torch.compile warmup failed: {e} — using eager model")
+        model = eager
+        with torch.inference_mode():
+            model(**encoded)
+    return model
+
+
+def prefix_token_ids(tokenizer, prefix: str = _INDEX_PREFIX) -> torch.Tensor:
+    """Tokenize [CLS] + task prefix once, for reuse with `encode_prefixed`."""
+    ids = tokenizer(prefix, add_special_tokens=False, return_tensors="pt").input_ids[0]
+    return torch.cat([torch.tensor([tokenizer.cls_token_id]), ids])
+
+
+def encode_prefixed(tokenizer, text: str, prefix_ids: torch.Tensor, device: str = "cpu", max_length: int = 512) -> dict:
+    """
+    Tokenize a single text and splice in the pre-tokenized prefix.
+
+    Yields the same ids as tokenizing `prefix + text` with the WordPiece
+    tokenizer (the prefix ends in whitespace), but only the text itself is
+    tokenized per call. No padding: a batch of one is already dense.
+    """
+    budget = max_length - prefix_ids.numel() - 1
+    ids = tokenizer(text, add_special_tokens=False, truncation=True, max_length=budget, return_tensors="pt").input_ids[0]
+    input_ids = torch.cat([prefix_ids, ids, torch.tensor([tokenizer.sep_token_id])]).unsqueeze(0).to(device)
+    encoded = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+    if "token_type_ids" in tokenizer.model_input_names:
+        encoded["token_type_ids"] = torch.zeros_like(input_ids)
+    return encoded
+
+
 def _mean_pooling(token_embeddings: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
     """Mean pooling over token embeddings."""
     input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
@@ -67,7 +196,7 @@ def _embed_texts(texts: List[str], prefix: str) -> List[List[float]]:
         return_tensors="pt",
     )
 
-    with torch.no_grad():
+    with torch.inference_mode():
         outputs = model(**encoded)
         token_embeddings = outputs.last_hidden_state
         pooled = _mean_pooling(token_embeddings, encoded["attention_mask"])
@@ -76,17 +205,30 @@ def _embed_texts(texts: List[str], prefix: str) -> List[List[float]]:
     return normalized.cpu().tolist()
 
 
-def embed_documents(texts: List[str]) -> List[List[float]]:
+def embed_documents(texts: List[str], forward_lock: AbstractContextManager = nullcontext()) -> List[List[float]]:
     """
     Embed a batch of document chunks for indexing.
     Applies the 'search_document:' task prefix.
-    Processes one at a time - no batching for stability.
+    Processes one at a time - no batching for stability. Repeated texts
+    (boilerplate, shared snippets) are embedded once and share a vector,
+    and texts already in the EMBED_CACHE_PATH cache (e.g. unchanged chunks
+    on a reset=True re-ingest) skip the model entirely. `forward_lock` is
+    held only around each model forward, not the cache lookups.
     """
-    all_vectors = []
-    for text in texts:
-        vectors = _embed_texts([text], _INDEX_PREFIX)
-        all_vectors.append(vectors[0])
-    return all_vectors
+    cache = _doc_cache()
+    unique = {}
+    for text in dict.fromkeys(texts):
+        cached = cache.get(text) if cache is not None else None
+        if cached is not None:
+            unique[text] = cached.tolist()
+            continue
+        with forward_lock:
+            unique[text] = _embed_texts([text], _INDEX_PREFIX)[0]
+        if cache is not None:
+            cache.put(text, unique[text])
+    if cache is not None:
+        cache.flush()
+    return [unique[text] for text in texts]
 
 
 def embed_query(text: str) -> List[float]:
@@ -94,13 +236,28 @@ def embed_query(text: str) -> List[float]:
     Embed a single retrieval query.
     Applies the 'search_query:' task prefix.
     """
-    vectors = _embed_texts([text], _QUERY_PREFIX)
-    return vectors[0]
+    return embed_queries([text])[0]
 
 
 def embed_queries(texts: List[str]) -> List[List[float]]:
-    """Embed multiple queries (for multi-query retrieval)."""
-    return _embed_texts(texts, _QUERY_PREFIX)
+    """
+    Embed multiple queries (for multi-query retrieval) in one padded forward.
+    Applies the 'search_query:' task prefix; use this, not embed_documents,
+    for anything that is searched with. Served from the in-memory query
+    cache where possible; only unique misses go through the model.
+    """
+    vectors = _QUERY_CACHE.get_many(_QUERY_PREFIX, texts)
+    misses = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+    if misses:
+        fresh = dict(zip(misses, _embed_texts(misses, _QUERY_PREFIX)))
+        _QUERY_CACHE.put_many(_QUERY_PREFIX, misses, [fresh[t] for t in misses])
+        vectors = [fresh[t] if v is None else v for t, v in zip(texts, vectors)]
+    return vectors
+
+
+def query_cache_stats() -> dict:
+    """Hit/miss counters and size of the query embedding cache."""
+    return _QUERY_CACHE.stats()
 
 
 def vector_size() -> int:
@@ -10,9 +10,11 @@ Dense vectors only. Full-text index on text field using TokenizerType.WORD.
 """
 
 from __future__ import annotations
+import hashlib
 import logging
 import uuid
 import sys
+import time
 from pathlib import Path
 from typing import List
 
@@ -20,12 +22,14 @@ from typing import List
 try:
     from config import Config
     from embedder import vector_size
+    from query_cache import cache_clear as _clear_query_cache
 except ImportError:
     # Add services/rag to path for module imports
     rag_path = Path(__file__).parent
     sys.path.insert(0, str(rag_path))
     from config import Config
     from embedder import vector_size
+    from query_cache import cache_clear as _clear_query_cache
 
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
@@ -33,18 +37,45 @@ from qdrant_client.models import (
     VectorParams,
     PointStruct,
     OptimizersConfigDiff,
+    HnswConfigDiff,
     TextIndexParams,
     TokenizerType,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CollectionStatus,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    SearchParams,
 )
 
 log = logging.getLogger(__name__)
 
+# Keep the single HTTP/2 channel warm between bursts of queries
+_GRPC_OPTIONS = {
+    "grpc.keepalive_time_ms": 30000,
+    "grpc.keepalive_timeout_ms": 10000,
+    "grpc.keepalive_permit_without_calls": 1,
+    "grpc.http2.max_pings_without_data": 0,
+}
+
 _VECTOR_SIZE: int | None = None
 _QDRANT_CLIENT: QdrantClient | None = None
+_KNOWN_COLLECTIONS: set[str] = set()   # collections confirmed to exist (read path)
+
+# Payload fields the retriever filters or groups on
+KEYWORD_INDEX_FIELDS = ("connector", "destination", "sync_mode", "doc_path", "doc_category", "chunk_type")
 
 
 def _client() -> QdrantClient:
-    """Create a Qdrant client from config. Thread-safe (clients are stateless)."""
+    """
+    Return the process-wide Qdrant client, created on first use.
+
+    Remote URLs use gRPC with keep-alive when QDRANT_PREFER_GRPC=true, so all
+    calls multiplex over one long-lived HTTP/2 connection.
+    """
     global _QDRANT_CLIENT
     if _QDRANT_CLIENT is not None:
         return _QDRANT_CLIENT
@@ -53,7 +84,12 @@ def _client() -> QdrantClient:
     api_key = Config.QDRANT_API_KEY
 
     if url.startswith("http"):
-        _QDRANT_CLIENT = QdrantClient(url=url, api_key=api_key)
+        _QDRANT_CLIENT = QdrantClient(
+            url=url,
+            api_key=api_key,
+            prefer_grpc=Config.QDRANT_PREFER_GRPC,
+            grpc_options=_GRPC_OPTIONS if Config.QDRANT_PREFER_GRPC else None,
+        )
     else:
         # Local file path
         _QDRANT_CLIENT = QdrantClient(path=url)
@@ -67,6 +103,76 @@ def _vec_size() -> int:
     return _VECTOR_SIZE
 
 
+def quantization_config():
+    """
+    Vector quantization for new collections, from QDRANT_QUANTIZATION.
+
+    int8   → scalar quantization (4x smaller, quantized vectors kept in RAM,
+             float32 originals on disk for rescoring)
+    binary → binary quantization (32x smaller, needs rescoring for recall)
+    none   → raw float32 only
+    """
+    mode = Config.QDRANT_QUANTIZATION.lower()
+    if mode == "int8":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def hnsw_config() -> HnswConfigDiff:
+    """
+    HNSW graph parameters for new collections.
+
+    A denser graph (QDRANT_HNSW_M) built with a wider beam
+    (QDRANT_HNSW_EF_CONSTRUCT) than Qdrant's defaults (16/100) keeps recall
+    high at query-time beam widths that stay fast. Existing collections keep
+    their graph until recreated (ingest with reset=True).
+    """
+    return HnswConfigDiff(m=Config.QDRANT_HNSW_M, ef_construct=Config.QDRANT_HNSW_EF_CONSTRUCT)
+
+
+def quantization_search_params() -> QuantizationSearchParams | None:
+    """
+    Query-time counterpart of quantization_config.
+
+    Traverses the index with the quantized vectors, fetching
+    QDRANT_OVERSAMPLING x limit candidates, then rescores them with the
+    original float32 vectors so recall stays close to unquantized search.
+    """
+    if Config.QDRANT_QUANTIZATION.lower() not in ("int8", "binary"):
+        return None
+    return QuantizationSearchParams(
+        ignore=False,
+        rescore=True,
+        oversampling=Config.QDRANT_OVERSAMPLING,
+    )
+
+
+def dense_vector_params(size: int) -> VectorParams:
+    """Dense vector config shared by every script that creates a collection."""
+    return VectorParams(
+        size=size,
+        distance=Distance.COSINE,
+        # Quantized copies serve the search from RAM; the float32
+        # originals are only read to rescore the final candidates
+        on_disk=quantization_search_params() is not None,
+    )
+
+
+def search_params() -> SearchParams | None:
+    """
+    Search parameters for dense queries: HNSW beam width (QDRANT_EF_SEARCH)
+    plus quantization rescoring. None for local-path storage, which always
+    searches exactly.
+    """
+    if not Config.QDRANT_URL.startswith("http"):
+        return None
+    return SearchParams(hnsw_ef=Config.QDRANT_EF_SEARCH, quantization=quantization_search_params())
+
+
 # ---------------------------------------------------------------------------
 # Collection management
 # ---------------------------------------------------------------------------
@@ -77,21 +183,20 @@ def ensure_collection(name: str, drop_first: bool = False) -> None:
 
     if drop_first and client.collection_exists(name):
         client.delete_collection(name)
+        _KNOWN_COLLECTIONS.discard(name)
+        _clear_query_cache()
         log.info(f"Dropped collection '{name}'")
 
     if not client.collection_exists(name):
         client.create_collection(
             collection_name=name,
-            vectors_config={
-                "dense": VectorParams(
-                    size=_vec_size(),
-                    distance=Distance.COSINE,
-                )
-            },
+            vectors_config={"dense": dense_vector_params(_vec_size())},
             # Dense vectors only - no sparse_vectors_config
             optimizers_config=OptimizersConfigDiff(
-                indexing_threshold=0,  # index immediately
+                indexing_threshold=0,  # defer HNSW build during bulk load (see enable_indexing)
             ),
+            hnsw_config=hnsw_config(),
+            quantization_config=quantization_config(),
         )
         log.info(f"Created collection '{name}'")
 
@@ -109,6 +214,99 @@ def ensure_collection(name: str, drop_first: bool = False) -> None:
         )
         log.info(f"Created full-text index on 'text' field for collection '{name}'")
 
+    ensure_payload_indexes(client, name)
+    check_point_id_scheme(client, name)
+
+
+def ensure_payload_indexes(client: QdrantClient, name: str) -> None:
+    """
+    Create keyword indexes on the fields the retriever filters and groups by.
+
+    Without them Qdrant evaluates connector/destination/sync_mode filters and
+    the doc_path grouping by scanning payloads. Idempotent, so it also
+    back-fills indexes on collections created before they existed. Skipped
+    for local-path storage, which has no payload indexes.
+    """
+    if not Config.QDRANT_URL.startswith("http"):
+        return
+    existing = client.get_collection(name).payload_schema or {}
+    for field in KEYWORD_INDEX_FIELDS:
+        if field not in existing:
+            client.create_payload_index(
+                collection_name=name,
+                field_name=field,
+                field_schema=PayloadSchemaType.KEYWORD,
+            )
+            log.info(f"Created keyword index on '{field}' for collection '{name}'")
+
+
+def collection_available(name: str) -> bool:
+    """
+    Cached collection_exists for the search path.
+
+    Collections only appear or disappear through ingestion, so a positive
+    answer is remembered for the life of the process (drops through
+    ensure_collection forget it; see invalidate_collection_cache).
+    Missing collections are re-checked on every call.
+    """
+    if name in _KNOWN_COLLECTIONS:
+        return True
+    client = _client()
+    if client.collection_exists(name):
+        _KNOWN_COLLECTIONS.add(name)
+        missing = []
+        if Config.QDRANT_URL.startswith("http"):
+            schema = client.get_collection(name).payload_schema or {}
+            missing = [f for f in KEYWORD_INDEX_FIELDS if f not in schema]
+        if missing:
+            log.warning(f"Collection '{name}' has no payload index on {missing}; "
+                        f"filtered searches will scan (re-run ingestion to create them)")
+        return True
+    return False
+
+
+def invalidate_collection_cache() -> None:
+    """Forget cached collection existence (e.g. after an external reset)."""
+    _KNOWN_COLLECTIONS.clear()
+
+
+def enable_indexing(
+    name: str,
+    client: QdrantClient | None = None,
+    threshold: int = 20000,
+    timeout: float = 600.0,
+    wait: bool = True,
+) -> None:
+    """
+    Re-enable HNSW indexing after a bulk load and wait for the collection to go GREEN.
+
+    Collections are created with indexing_threshold=0 so segments aren't
+    re-indexed while points stream in; without this step searches keep
+    scanning unindexed storage. wait=False only flips the threshold and
+    returns; Qdrant builds the index in the background.
+    """
+    client = client or _client()
+    client.update_collection(
+        collection_name=name,
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold),
+    )
+    if not wait:
+        log.info(f"Indexing enabled on '{name}' (building in background)")
+        return
+
+    delay = 0.5
+    deadline = time.monotonic() + timeout
+    info = client.get_collection(name)
+    while info.status != CollectionStatus.GREEN:
+        if time.monotonic() >= deadline:
+            log.warning(f"Collection '{name}' still {info.status} after {timeout:.0f}s; indexing continues in background")
+            return
+        time.sleep(delay)
+        delay = min(delay * 2, 10.0)
+        info = client.get_collection(name)
+
+    log.info(f"Indexing enabled on '{name}' ({info.indexed_vectors_count}/{info.points_count} vectors indexed)")
+
 
 def list_collections() -> List[str]:
     """Return names of all existing Qdrant collections."""
@@ -156,14 +354,44 @@ def collection_stats(name: str) -> dict:
 # Upsert
 # ---------------------------------------------------------------------------
 
-def upsert_chunks(collection: str, chunks: list, vectors: List[List[float]]) -> int:
+def point_id(chunk_id: str) -> str:
+    """Deterministic Qdrant point ID for a chunk (128-bit blake2b as a UUID)."""
+    return str(uuid.UUID(bytes=hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=16).digest()))
+
+
+def check_point_id_scheme(client: QdrantClient, name: str) -> None:
+    """
+    Refuse to write into a collection whose points use another ID scheme.
+
+    Point IDs used to be uuid5(NAMESPACE_DNS, chunk_id). Upserting into such
+    a collection without a reset would store a second copy of every chunk
+    under its new ID, so one sampled point decides before anything is written.
+    """
+    points, _ = client.scroll(collection_name=name, limit=1, with_payload=["chunk_id"], with_vectors=False)
+    if not points:
+        return
+    chunk_id = (points[0].payload or {}).get("chunk_id")
+    if chunk_id and str(points[0].id) != point_id(chunk_id):
+        raise RuntimeError(
+            f"Collection '{name}' was built with the old uuid5 point IDs; "
+            "re-ingest with reset to rebuild it"
+        )
+
+
+def upsert_chunks(collection: str, chunks: list, vectors: List[List[float]], *, wait: bool = True) -> int:
     """
     Upsert chunk documents into Qdrant.
 
+    Batches are sent with wait=False, so Qdrant acknowledges them once they
+    are in its WAL and the next batch is sent without waiting for it to be
+    applied. The last batch uses `wait`; Qdrant applies updates in order, so
+    a wait=True batch returns only after every earlier one is visible.
+
     Args:
         collection: Collection name
         chunks:     List of Chunk dataclass instances
         vectors:    Parallel list of dense embedding vectors
+        wait:       Block until the final batch (and so all earlier ones) is applied
 
     Returns:
         Number of points upserted
@@ -173,16 +401,18 @@ def upsert_chunks(collection: str, chunks: list, vectors: List[List[float]]) ->
 
     for chunk, vec in zip(chunks, vectors):
         # Use chunk_id as deterministic UUID so re-ingesting is idempotent
-        point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk.chunk_id))
         payload = chunk.to_payload()  # dict with text + all metadata fields
 
-        points.append(PointStruct(id=point_id, vector={"dense": vec}, payload=payload))
+        points.append(PointStruct(id=point_id(chunk.chunk_id), vector={"dense": vec}, payload=payload))
 
-    BATCH = 64
+    BATCH = 256
     for i in range(0, len(points), BATCH):
-        client.upsert(collection_name=collection, points=points[i : i + BATCH])
+        last = i + BATCH >= len(points)
+        client.upsert(collection_name=collection, points=points[i : i + BATCH], wait=wait if last else False)
         log.info(f"  Upserted batch {i // BATCH + 1} ({len(points[i : i + BATCH])} chunks)")
 
+    if points:
+        _clear_query_cache()
     return len(points)
 
 
@@ -33,7 +33,6 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import gc
 import json
 import logging
 import os
@@ -41,6 +40,7 @@ import sys
 import time
 import traceback
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -53,12 +53,13 @@ os.environ["OMP_NUM_THREADS"] = "1"
 os.environ["MKL_NUM_THREADS"] = "1"
 
 from config import Config
-from chunker import parse_file, Chunk
+from chunker import iter_chunks, Chunk
 from embedder import embed_documents, vector_size
-from indexer import ensure_collection, upsert_chunks, _client
+from indexer import enable_indexing, ensure_collection, upsert_chunks, _client
 from ingest_utils import (
     Checkpoint,
     CheckpointManager,
+    ChunkFilter,
     ProgressTracker,
     batch_generator,
     retry_with_backoff,
@@ -145,15 +146,17 @@ class DocIngester:
             if not self.dry_run:
                 self._initialize_collections()
 
-            # Parse chunks
+            # Parse chunks, separating docs and code in a single pass
             self.logger.info("Parsing document...")
-            all_chunks = parse_file(self.docs_path)
-            self.stats["total_chunks"] = len(all_chunks)
-            self.logger.info(f"Parsed {len(all_chunks)} total chunks")
+            docs_chunks: List[Chunk] = []
+            code_chunks: List[Chunk] = []
+            chunk_filter = ChunkFilter()
+            for c in iter_chunks(self.docs_path):
+                if chunk_filter.accept(c):
+                    (code_chunks if c.chunk_type == "code" else docs_chunks).append(c)
+            self.stats["total_chunks"] = len(docs_chunks) + len(code_chunks)
+            self.logger.info(f"Parsed {self.stats['total_chunks']} total chunks ({chunk_filter.summary()})")
 
-            # Separate docs and code chunks
-            docs_chunks = [c for c in all_chunks if c.chunk_type != "code"]
-            code_chunks = [c for c in all_chunks if c.chunk_type == "code"]
             self.stats["docs_chunks"] = len(docs_chunks)
             self.stats["code_chunks"] = len(code_chunks)
             self.logger.info(f"  Docs chunks: {len(docs_chunks)}")
@@ -175,7 +178,15 @@ class DocIngester:
                     checkpoint_key="code",
                 )
 
+            # Build HNSW indexes now that the bulk load is done
+            if not self.dry_run:
+                if self.target_collection in ("both", "docs"):
+                    enable_indexing(DOCS_COLLECTION)
+                if self.target_collection in ("both", "code"):
+                    enable_indexing(CODE_COLLECTION)
+
             # Success
+            self.checkpoint_manager.flush()
             self.stats["end_time"] = datetime.now(timezone.utc).isoformat()
             self.logger.info("✓ Ingestion completed successfully")
             self._log_summary()
@@ -186,6 +197,7 @@ class DocIngester:
             }
 
         except Exception as e:
+            self.checkpoint_manager.flush()
             self.stats["end_time"] = datetime.now(timezone.utc).isoformat()
             self.logger.error(f"Ingestion failed: {e}")
             log_error_details(e)
@@ -257,16 +269,12 @@ class DocIngester:
         batch_num = 0
         current_idx = start_idx
 
-        for batch in batch_generator(chunks[start_idx:], batch_size=BATCH_SIZE, max_batches_before_gc=50):
-            # GC hint
-            if not batch:
-                gc.collect()
-                if check_memory_threshold(MEMORY_THRESHOLD_MB):
-                    self.logger.warning("Memory threshold exceeded, forcing GC")
-                    gc.collect()
-                continue
-
+        for batch in batch_generator(islice(chunks, start_idx, None), batch_size=BATCH_SIZE, max_batches_before_gc=50):
             batch_num += 1
+            # batch_generator already runs gc.collect() every 50 batches; just report memory
+            if batch_num % 50 == 0:
+                check_memory_threshold(MEMORY_THRESHOLD_MB)
+
             batch_start = current_idx
             batch_end = current_idx + len(batch)
 
@@ -337,9 +345,10 @@ class DocIngester:
                     self.logger.debug(f"Checkpoint saved at {current_idx}/{len(chunks)}")
 
                 # Report progress
-                if progress.should_report(interval_seconds=15.0):
+                now = time.monotonic()
+                if progress.should_report(interval_seconds=15.0, now=now):
                     prefix = f"[{collection}] "
-                    self.logger.info(progress.report(prefix))
+                    self.logger.info(progress.report(prefix, now=now))
 
             except Exception as e:
                 self.logger.error(f"Batch {batch_num} failed: {e}")
@@ -354,7 +363,7 @@ class DocIngester:
         # Final checkpoint save and cleanup
         checkpoint.status = "completed"
         checkpoint.end_time = datetime.now(timezone.utc).isoformat()
-        self.checkpoint_manager.save(checkpoint)
+        self.checkpoint_manager.save(checkpoint, force=True)
         self.logger.info(f"✓ {collection} ingestion complete: {progress.processed}/{len(chunks)} chunks")
 
         # Clean up checkpoint on success
@@ -24,16 +24,20 @@ from __future__ import annotations
 
 import argparse
 import gc
-import json
 import logging
 import os
+import queue
 import sys
+import threading
 import time
 import traceback
+import tracemalloc
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
 # Disable ALL parallelism BEFORE any imports
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 os.environ["OMP_NUM_THREADS"] = "1"
@@ -41,11 +45,13 @@ os.environ["MKL_NUM_THREADS"] = "1"
 os.environ["OPENBLAS_NUM_THREADS"] = "1"
 os.environ["VECLIB_MAXIMUM_THREADS"] = "1"
 os.environ["NUMEXPR_NUM_THREADS"] = "1"
+os.environ.setdefault("PYTORCH_ENABLE_MPS_FALLBACK", "1")  # CPU fallback for ops MPS lacks
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import Config
+import json_utils
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -54,6 +60,9 @@ from config import Config
 CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "./.ingest_checkpoints")
 LOG_FILE = os.getenv("INGEST_LOG_FILE", "./ingest.log")
 MEMORY_CHECK_INTERVAL = 50  # Check memory every N chunks
+TRACE_MEMORY = os.getenv("INGEST_TRACE_MEMORY", "false").lower() == "true"  # tracemalloc heap peak
+PIPELINE_DEPTH = 4  # Embedded points buffered ahead of the upsert thread
+UPSERT_BATCH = 32  # Points per Qdrant upsert issued by the writer thread
 
 # Collection names
 DOCS_COLLECTION = Config.DOCS_COLLECTION
@@ -97,11 +106,21 @@ logger = setup_logging(LOG_FILE)
 # ---------------------------------------------------------------------------
 
 class CheckpointManager:
-    """Manages checkpoint files for crash recovery."""
+    """
+    Manages checkpoint files for crash recovery.
+
+    Saves are buffered in memory and written every `flush_interval` updates
+    (or on `flush()`), so the per-chunk save call is cheap. Writes go to a
+    temp file followed by `os.replace`, so a crash never leaves a truncated
+    checkpoint behind.
+    """
 
-    def __init__(self, checkpoint_dir: str = CHECKPOINT_DIR):
+    def __init__(self, checkpoint_dir: str = CHECKPOINT_DIR, flush_interval: int = 100):
         self.checkpoint_dir = Path(checkpoint_dir)
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self._flush_interval = flush_interval
+        self._pending: Dict[str, Dict] = {}
+        self.dirty_count = 0
 
     def _checkpoint_path(self, name: str) -> Path:
         safe_name = name.replace("/", "_").replace("\\", "_")
@@ -113,19 +132,32 @@ class CheckpointManager:
         if not path.exists():
             return None
         try:
-            return json.loads(path.read_text(encoding="utf-8"))
+            return json_utils.loads(path.read_bytes())
         except Exception as e:
             logger.warning(f"Failed to load checkpoint: {e}")
             return None
 
-    def save(self, name: str, data: Dict) -> None:
-        """Save checkpoint."""
-        path = self._checkpoint_path(name)
-        data["last_updated"] = datetime.now(timezone.utc).isoformat()
-        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    def save(self, name: str, data: Dict, force: bool = False) -> None:
+        """Record checkpoint state; written to disk every `flush_interval` saves."""
+        self._pending[name] = data
+        self.dirty_count += 1
+        if force or self.dirty_count >= self._flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all pending checkpoints to disk."""
+        for name, data in self._pending.items():
+            path = self._checkpoint_path(name)
+            tmp = path.with_suffix(".tmp")
+            data["last_updated"] = datetime.now(timezone.utc).isoformat()
+            tmp.write_bytes(json_utils.dumps(data))
+            os.replace(tmp, path)
+        self._pending.clear()
+        self.dirty_count = 0
 
     def delete(self, name: str) -> None:
         """Delete checkpoint."""
+        self._pending.pop(name, None)
         path = self._checkpoint_path(name)
         if path.exists():
             path.unlink()
@@ -147,6 +179,13 @@ def get_memory_mb() -> float:
         return 0.0
 
 
+def get_heap_peak_mb() -> float:
+    """Peak Python-heap usage in MB (0.0 unless tracemalloc is tracing)."""
+    if not tracemalloc.is_tracing():
+        return 0.0
+    return tracemalloc.get_traced_memory()[1] / 1e6
+
+
 # ---------------------------------------------------------------------------
 # Qdrant client
 # ---------------------------------------------------------------------------
@@ -163,15 +202,20 @@ def get_qdrant_client():
     api_key = Config.QDRANT_API_KEY
 
     if url.startswith("http"):
-        return QdrantClient(url=url, api_key=api_key), VectorParams, OptimizersConfigDiff
+        client = QdrantClient(url=url, api_key=api_key, prefer_grpc=Config.QDRANT_PREFER_GRPC)
+        return client, VectorParams, OptimizersConfigDiff
     else:
         return QdrantClient(path=url), VectorParams, OptimizersConfigDiff
 
 
 def ensure_collection(client, name: str, vector_size: int, drop_first: bool = False) -> None:
     """Create collection if needed."""
-    from qdrant_client.models import Distance, TextIndexParams, TokenizerType
-    VectorParams, OptimizersConfigDiff = get_qdrant_client()[1:]
+    from qdrant_client.models import (
+        OptimizersConfigDiff, TextIndexParams, TokenizerType,
+    )
+    from indexer import (
+        check_point_id_scheme, dense_vector_params, ensure_payload_indexes, hnsw_config, quantization_config,
+    )
 
     if drop_first and client.collection_exists(name):
         client.delete_collection(name)
@@ -180,9 +224,11 @@ def ensure_collection(client, name: str, vector_size: int, drop_first: bool = Fa
     if not client.collection_exists(name):
         client.create_collection(
             collection_name=name,
-            vectors_config={"dense": VectorParams(size=vector_size, distance=Distance.COSINE)},
+            vectors_config={"dense": dense_vector_params(vector_size)},
             # Dense vectors only - no sparse_vectors_config
             optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
+            hnsw_config=hnsw_config(),
+            quantization_config=quantization_config(),
         )
         logger.info(f"Created collection: {name}")
 
@@ -200,13 +246,16 @@ def ensure_collection(client, name: str, vector_size: int, drop_first: bool = Fa
         )
         logger.info(f"Created full-text index on 'text' field for collection: {name}")
 
+    ensure_payload_indexes(client, name)
+    check_point_id_scheme(client, name)
+
 
 # ---------------------------------------------------------------------------
 # Embedding (single-threaded, one at a time)
 # ---------------------------------------------------------------------------
 
 def get_embedding_model():
-    """Load embedding model (cached)."""
+    """Load embedding model; returns (model, tokenizer, prefix_ids)."""
     import torch
     from transformers import AutoModel, AutoTokenizer
 
@@ -218,18 +267,34 @@ def get_embedding_model():
         local_files_only=True,
         trust_remote_code=True,
     )
-    model = AutoModel.from_pretrained(
-        Config.EMBED_MODEL,
-        local_files_only=True,
-        trust_remote_code=True,
-    )
-    model.eval()
-    log.info("Embedding model loaded")
-    return model, tokenizer
+    from embedder import compile_model, prefix_token_ids, quantize_model, select_device, warmup_model
+    device = select_device()
+    prefix_ids = prefix_token_ids(tokenizer)
+
+    model = None
+    if Config.EMBED_BACKEND == "onnx" and device == "cpu":
+        from embed_onnx import load_onnx_model
+        model = load_onnx_model(Config.EMBED_MODEL)
+    if model is None:
+        model = AutoModel.from_pretrained(
+            Config.EMBED_MODEL,
+            local_files_only=True,
+            trust_remote_code=True,
+        )
+        model.eval()
+        model.to(device)
+        model = quantize_model(model, device)
+        model = compile_model(model)
+
+    model = warmup_model(model, tokenizer, prefix_ids, device)
+
+    log.info(f"Embedding model loaded on {device}")
+    return model, tokenizer, prefix_ids
 
 
 def _mean_pooling(token_embeddings: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
     """Mean pooling over token embeddings."""
+    import torch
     input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
     sum_embeddings = torch.sum(token_embeddings * input_mask_expanded, 1)
     sum_mask = torch.clamp(input_mask_expanded.sum(1), min=1e-9)
@@ -238,35 +303,203 @@ def _mean_pooling(token_embeddings: torch.Tensor, attention_mask: torch.Tensor)
 
 def _normalize_embeddings(embeddings: torch.Tensor) -> torch.Tensor:
     """L2 normalize embeddings."""
+    import torch
     return torch.nn.functional.normalize(embeddings, p=2, dim=1)
 
 
-def embed_single(model_tokenizer, text: str) -> List[float]:
-    """Embed a single text."""
-    model, tokenizer = model_tokenizer
-    prefixed = "search_document: " + text
+def embed_single(model_tokenizer, text: str, cache=None) -> np.ndarray:
+    """
+    Embed a single text, consulting the persistent cache first if given.
 
-    encoded = tokenizer(
-        prefixed,
-        padding=True,
-        truncation=True,
-        max_length=512,
-        return_tensors="pt",
-    )
+    Returns a float32 array of shape (dim,); it is converted to a list only
+    when the upsert writer builds a Qdrant batch.
+    """
+    if cache is not None:
+        cached = cache.get(text)
+        if cached is not None:
+            return cached
+
+    import torch
+    from embedder import encode_prefixed
+    model, tokenizer, prefix_ids = model_tokenizer
+
+    # Prefix ids were tokenized once at load; only the chunk text is tokenized here
+    encoded = encode_prefixed(tokenizer, text, prefix_ids, model.device)
 
-    with torch.no_grad():
+    with torch.inference_mode():
         outputs = model(**encoded)
         token_embeddings = outputs.last_hidden_state
         pooled = _mean_pooling(token_embeddings, encoded["attention_mask"])
         normalized = _normalize_embeddings(pooled)
 
-    return normalized.cpu().tolist()
+    vector = normalized.cpu().numpy().astype(np.float32, copy=False)[0]
+    if cache is not None:
+        cache.put(text, vector)
+    return vector
 
 
 # ---------------------------------------------------------------------------
 # Main ingestion
 # ---------------------------------------------------------------------------
 
+class _CollectionState:
+    """Resume and progress state for one collection in the streaming loop."""
+
+    def __init__(self, collection: str, checkpoint_mgr: CheckpointManager, checkpoint_name: str, reset: bool):
+        self.collection = collection
+        self.checkpoint_mgr = checkpoint_mgr
+        self.checkpoint_name = checkpoint_name
+        self.seen = 0  # chunks routed to this collection so far (stream index)
+        self.start_idx = 0
+        self.skip_all = False
+
+        checkpoint = checkpoint_mgr.load(checkpoint_name)
+        if checkpoint and not reset:
+            if checkpoint.get("status") == "completed":
+                logger.info(f"Already completed ({checkpoint_name}), skipping")
+                self.skip_all = True
+            self.start_idx = checkpoint.get("processed", 0)
+            logger.info(f"Resuming {checkpoint_name} from chunk {self.start_idx}")
+        else:
+            checkpoint = {
+                "collection": collection,
+                "total": 0,
+                "processed": 0,
+                "upserted": 0,
+                "failed": 0,
+                "status": "running",
+                "start_time": datetime.now(timezone.utc).isoformat(),
+            }
+        self.checkpoint = checkpoint
+        self.upserted = checkpoint.get("upserted", 0)
+        self.failed = checkpoint.get("failed", 0)
+
+    def record(self, i: int, error: Optional[Exception] = None) -> None:
+        """Record the outcome of chunk i. Called only from the upsert thread."""
+        if error is None:
+            self.upserted += 1
+            self.checkpoint["processed"] = i + 1
+            self.checkpoint["upserted"] = self.upserted
+        else:
+            self.failed += 1
+            logger.error(f"{self.checkpoint_name} chunk {i} failed: {error}")
+            self.checkpoint["failed"] = self.failed
+        self.checkpoint_mgr.save(self.checkpoint_name, self.checkpoint)
+
+    def finish(self) -> int:
+        """Mark the collection complete and drop its checkpoint."""
+        if self.skip_all:
+            return self.upserted
+        self.checkpoint["total"] = self.seen
+        self.checkpoint["status"] = "completed"
+        self.checkpoint["end_time"] = datetime.now(timezone.utc).isoformat()
+        self.checkpoint_mgr.save(self.checkpoint_name, self.checkpoint, force=True)
+        self.checkpoint_mgr.delete(self.checkpoint_name)
+
+        logger.info(f"✓ {self.collection}: {self.upserted}/{self.seen} chunks upserted")
+        return self.upserted
+
+
+class _UpsertPipeline:
+    """
+    Single background writer shared by all collections.
+
+    Chunk i+1 embeds on the main thread while earlier chunks are in flight
+    to Qdrant. Vectors arrive as float32 arrays and are grouped per
+    collection into `UPSERT_BATCH`-sized Batch upserts, converted to lists
+    in one call on the stacked array. The bounded queue gives backpressure,
+    and the writer is the only thread touching collection state, so
+    checkpoints only advance after an upsert has succeeded. If the writer
+    dies (e.g. a checkpoint save raises), the next submit/close re-raises
+    its exception instead of blocking on the full queue.
+    """
+
+    def __init__(self, client, depth: int = PIPELINE_DEPTH, batch_size: int = UPSERT_BATCH):
+        self._client = client
+        self._batch_size = batch_size
+        self._pending: Dict[int, Tuple[_CollectionState, List[Tuple[int, str, np.ndarray, Dict]]]] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=depth)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="upsert-writer", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        state: _CollectionState,
+        i: int,
+        pid: Optional[str] = None,
+        vector: Optional[np.ndarray] = None,
+        payload: Optional[Dict] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        self._put((state, i, pid, vector, payload, error))
+
+    def close(self) -> None:
+        """Drain outstanding upserts and stop the writer."""
+        self._put(None)
+        self._thread.join()
+        self._raise_if_failed()
+
+    def _put(self, item) -> None:
+        while True:
+            self._raise_if_failed()
+            try:
+                self._queue.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"Upsert writer failed: {self._error}") from self._error
+        if not self._thread.is_alive() and self._queue.full():
+            raise RuntimeError("Upsert writer exited")
+
+    def _flush(self, state: _CollectionState, rows: List[Tuple[int, str, np.ndarray, Dict]]) -> None:
+        from qdrant_client.models import Batch
+
+        error = None
+        try:
+            self._client.upsert(
+                collection_name=state.collection,
+                points=Batch(
+                    ids=[r[1] for r in rows],
+                    vectors={"dense": np.stack([r[2] for r in rows]).tolist()},
+                    payloads=[r[3] for r in rows],
+                ),
+            )
+        except Exception as e:
+            error = e
+        for r in rows:
+            state.record(r[0], error)
+        rows.clear()
+
+    def _run(self) -> None:
+        try:
+            self._drain()
+        except BaseException as e:
+            self._error = e
+            logger.error(f"Upsert writer failed: {e}")
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            state, i, pid, vector, payload, error = item
+            if error is not None:
+                state.record(i, error)
+                continue
+            _, rows = self._pending.setdefault(id(state), (state, []))
+            rows.append((i, pid, vector, payload))
+            if len(rows) >= self._batch_size:
+                self._flush(state, rows)
+
+        for state, rows in self._pending.values():
+            if rows:
+                self._flush(state, rows)
+
+
 def ingest_incremental(
     docs_path: Path,
     reset: bool = False,
@@ -275,7 +508,10 @@ def ingest_incremental(
     """
     Ingest documents one chunk at a time.
 
-    This is slower but prevents crashes from multiprocessing issues.
+    Chunks are streamed from the parser and routed to their collection as
+    they arrive, so memory stays bounded by one parsed file rather than the
+    whole corpus. This is slower but prevents crashes from multiprocessing
+    issues.
     """
     stats = {
         "total_chunks": 0,
@@ -288,6 +524,9 @@ def ingest_incremental(
         "end_time": "",
         "errors": [],
     }
+    embed_cache = None
+    if TRACE_MEMORY:
+        tracemalloc.start()
 
     try:
         # Validate source
@@ -297,24 +536,12 @@ def ingest_incremental(
         logger.info(f"Starting incremental ingestion from {docs_path}")
         logger.info(f"Reset: {reset}, Collection: {collection}")
 
-        # Load chunker and parse
-        from chunker import parse_file
-
-        logger.info("Parsing document...")
-        all_chunks = parse_file(docs_path)
-        stats["total_chunks"] = len(all_chunks)
-
-        docs_chunks = [c for c in all_chunks if c.chunk_type != "code"]
-        code_chunks = [c for c in all_chunks if c.chunk_type == "code"]
-
-        stats["docs_chunks"] = len(docs_chunks)
-        stats["code_chunks"] = len(code_chunks)
-
-        logger.info(f"Parsed {len(all_chunks)} chunks ({len(docs_chunks)} docs, {len(code_chunks)} code)")
+        from chunker import iter_chunks
+        from ingest_utils import ChunkFilter
+        from indexer import point_id
 
         # Initialize Qdrant
         client, VectorParams, OptimizersConfigDiff = get_qdrant_client()
-        from qdrant_client.models import Distance
 
         # Get embedding model
         embed_model = get_embedding_model()
@@ -332,43 +559,88 @@ def ingest_incremental(
         # Checkpoint manager
         checkpoint_mgr = CheckpointManager(CHECKPOINT_DIR)
 
-        # Ingest docs
-        if collection in ("both", "docs") and docs_chunks:
-            logger.info(f"\nIngesting {len(docs_chunks)} docs chunks...")
-            upserted = _ingest_chunks_incremental(
-                client=client,
-                collection=DOCS_COLLECTION,
-                chunks=docs_chunks,
-                embed_model=embed_model,
-                checkpoint_mgr=checkpoint_mgr,
-                checkpoint_name="docs",
-                reset=reset,
-            )
-            stats["upserted_docs"] = upserted
-
-        # Ingest code
-        if collection in ("both", "code") and code_chunks:
-            logger.info(f"\nIngesting {len(code_chunks)} code chunks...")
-            upserted = _ingest_chunks_incremental(
-                client=client,
-                collection=CODE_COLLECTION,
-                chunks=code_chunks,
-                embed_model=embed_model,
-                checkpoint_mgr=checkpoint_mgr,
-                checkpoint_name="code",
-                reset=reset,
-            )
-            stats["upserted_code"] = upserted
+        # Persistent embedding cache (skips re-embedding unchanged/duplicate chunks)
+        if Config.EMBED_CACHE_PATH:
+            from embed_cache import EmbeddingCache
+            from embedder import precision_tag
+            embed_cache = EmbeddingCache(Config.EMBED_CACHE_PATH, variant=precision_tag(embed_model[0]))
+
+        targets: Dict[str, _CollectionState] = {}
+        if collection in ("both", "docs"):
+            targets["docs"] = _CollectionState(DOCS_COLLECTION, checkpoint_mgr, "docs", reset)
+        if collection in ("both", "code"):
+            targets["code"] = _CollectionState(CODE_COLLECTION, checkpoint_mgr, "code", reset)
+
+        logger.info("Streaming chunks...")
+        pipeline = _UpsertPipeline(client)
+        processed = 0
+        start_time = time.time()
+
+        chunk_filter = ChunkFilter()
+
+        try:
+            for chunk in iter_chunks(docs_path):
+                if not chunk_filter.accept(chunk):
+                    continue
+                kind = "code" if chunk.chunk_type == "code" else "docs"
+                stats["total_chunks"] += 1
+                stats[f"{kind}_chunks"] += 1
+
+                state = targets.get(kind)
+                if state is None:
+                    continue
+                i = state.seen
+                state.seen += 1
+                if state.skip_all or i < state.start_idx:
+                    continue
+
+                try:
+                    # Embed chunk (one at a time)
+                    dense_vector = embed_single(embed_model, chunk.text, cache=embed_cache)
+
+                    # Create point
+                    pid = point_id(chunk.chunk_id)
+                    payload = chunk.to_payload()
+
+                    # Dense vectors only (named vector); batched and upserted by the writer thread
+                    pipeline.submit(state, i, pid, dense_vector, payload)
+                except Exception as e:
+                    pipeline.submit(state, i, error=e)
+
+                processed += 1
+
+                # Progress report
+                if processed % 10 == 0:
+                    elapsed = time.time() - start_time
+                    rate = processed / elapsed if elapsed > 0 else 0
+                    logger.info(f"Progress: {processed} chunks embedded ({stats['total_chunks']} parsed) | Rate: {rate:.2f} chunks/s")
+
+                # Memory check (refcounting frees per-chunk tensors; no forced GC here)
+                if processed % MEMORY_CHECK_INTERVAL == 0:
+                    logger.debug(f"Memory usage: {get_memory_mb():.1f} MB RSS, {get_heap_peak_mb():.1f} MB heap peak")
+        finally:
+            pipeline.close()
+            checkpoint_mgr.flush()
+
+        from indexer import enable_indexing
+        for kind, state in targets.items():
+            stats[f"upserted_{kind}"] = state.finish()
+            stats["failed"] += state.failed
+            enable_indexing(state.collection, client)
+        gc.collect()
 
         # Success
         stats["end_time"] = datetime.now(timezone.utc).isoformat()
         logger.info("\n" + "="*60)
         logger.info("INGESTION COMPLETE")
         logger.info("="*60)
-        logger.info(f"Total chunks:     {stats['total_chunks']}")
+        logger.info(f"Total chunks:     {stats['total_chunks']} ({stats['docs_chunks']} docs, {stats['code_chunks']} code)")
         logger.info(f"Docs upserted:    {stats['upserted_docs']}")
         logger.info(f"Code upserted:    {stats['upserted_code']}")
         logger.info(f"Failed:           {stats['failed']}")
+        logger.info(f"Filtered:         {chunk_filter.summary()}")
+        if tracemalloc.is_tracing():
+            logger.info(f"Peak heap:        {get_heap_peak_mb():.1f} MB")
 
         return {"ok": True, "stats": stats}
 
@@ -379,96 +651,11 @@ def ingest_incremental(
         logger.error(traceback.format_exc())
         return {"ok": False, "error": str(e), "stats": stats}
 
-
-def _ingest_chunks_incremental(
-    client,
-    collection: str,
-    chunks: List,
-    embed_model,
-    checkpoint_mgr: CheckpointManager,
-    checkpoint_name: str,
-    reset: bool = False,
-) -> int:
-    """Ingest chunks one at a time."""
-    from qdrant_client.models import PointStruct
-    import uuid
-
-    # Load checkpoint
-    checkpoint = checkpoint_mgr.load(checkpoint_name)
-    start_idx = 0
-
-    if checkpoint and not reset:
-        if checkpoint.get("status") == "completed":
-            logger.info(f"Already completed ({checkpoint_name}), skipping")
-            return checkpoint.get("upserted", 0)
-        start_idx = checkpoint.get("processed", 0)
-        logger.info(f"Resuming from chunk {start_idx}/{len(chunks)}")
-    else:
-        checkpoint = {
-            "collection": collection,
-            "total": len(chunks),
-            "processed": 0,
-            "upserted": 0,
-            "failed": 0,
-            "status": "running",
-            "start_time": datetime.now(timezone.utc).isoformat(),
-        }
-
-    upserted = checkpoint.get("upserted", 0)
-    failed = checkpoint.get("failed", 0)
-
-    start_time = time.time()
-
-    for i, chunk in enumerate(chunks[start_idx:], start=start_idx):
-        try:
-            # Progress report
-            if (i + 1) % 10 == 0 or i == len(chunks) - 1:
-                elapsed = time.time() - start_time
-                rate = (i + 1) / elapsed if elapsed > 0 else 0
-                logger.info(f"Progress: {i + 1}/{len(chunks)} ({(i + 1) / len(chunks) * 100:.1f}%) | Rate: {rate:.2f} chunks/s")
-
-            # Embed chunk (one at a time)
-            text = chunk.text
-            dense_vector = embed_single(embed_model, text)
-
-            # Create point
-            point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk.chunk_id))
-            payload = chunk.to_payload()
-
-            # Dense vectors only (named vector)
-            client.upsert(
-                collection_name=collection,
-                points=[PointStruct(id=point_id, vector={"dense": dense_vector}, payload=payload)],
-            )
-
-            upserted += 1
-
-            # Update checkpoint
-            checkpoint["processed"] = i + 1
-            checkpoint["upserted"] = upserted
-            checkpoint_mgr.save(checkpoint_name, checkpoint)
-
-            # Memory check and GC
-            if (i + 1) % MEMORY_CHECK_INTERVAL == 0:
-                mem_mb = get_memory_mb()
-                logger.debug(f"Memory usage: {mem_mb:.1f} MB")
-                gc.collect()
-
-        except Exception as e:
-            failed += 1
-            logger.error(f"Chunk {i} failed: {e}")
-            checkpoint["failed"] = failed
-            checkpoint_mgr.save(checkpoint_name, checkpoint)
-            continue
-
-    # Cleanup
-    checkpoint["status"] = "completed"
-    checkpoint["end_time"] = datetime.now(timezone.utc).isoformat()
-    checkpoint_mgr.save(checkpoint_name, checkpoint)
-    checkpoint_mgr.delete(checkpoint_name)
-
-    logger.info(f"✓ {collection}: {upserted}/{len(chunks)} chunks upserted")
-    return upserted
+    finally:
+        if embed_cache is not None:
+            embed_cache.close()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
 
 
 # ---------------------------------------------------------------------------
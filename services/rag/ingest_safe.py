@@ -19,13 +19,13 @@ os.environ["OPENBLAS_NUM_THREADS"] = "1"
 os.environ["VECLIB_MAXIMUM_THREADS"] = "1"
 os.environ["NUMEXPR_NUM_THREADS"] = "1"
 os.environ["PYTORCH_MPS_HIGH_WATERMARK_RATIO"] = "0.0"
+os.environ.setdefault("PYTORCH_ENABLE_MPS_FALLBACK", "1")  # CPU fallback for ops MPS lacks
 
 import sys
 import json
 import logging
 import time
 import gc
-import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict, Optional, Any
@@ -33,14 +33,23 @@ from typing import List, Dict, Optional, Any
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import Config
+from embedder import (
+    compile_model, encode_prefixed, precision_tag, prefix_token_ids, quantize_model, select_device, warmup_model,
+)
+from embed_onnx import load_onnx_model
+from embed_cache import EmbeddingCache
+from indexer import (
+    check_point_id_scheme, dense_vector_params, enable_indexing, ensure_payload_indexes, hnsw_config, point_id,
+    quantization_config,
+)
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
-    Distance, VectorParams,
     OptimizersConfigDiff, PointStruct,
     TextIndexParams,
     TokenizerType,
 )
 
+import numpy as np
 import torch
 from transformers import AutoModel, AutoTokenizer
 
@@ -71,14 +80,27 @@ class SingleThreadEmbedder:
             local_files_only=True,
             trust_remote_code=True,
         )
-        self._model = AutoModel.from_pretrained(
-            model_name,
-            local_files_only=True,
-            trust_remote_code=True,
-        )
-        self._model.eval()
-        self._model.to(device)
+        self._model = None
+        if Config.EMBED_BACKEND == "onnx" and device == "cpu":
+            self._model = load_onnx_model(model_name)
+        if self._model is None:
+            self._model = AutoModel.from_pretrained(
+                model_name,
+                local_files_only=True,
+                trust_remote_code=True,
+            )
+            self._model.eval()
+            self._model.to(device)
+            self._model = quantize_model(self._model, device)
+            self._model = compile_model(self._model)
         self._device = device
+        self._prefix_ids = prefix_token_ids(self._tokenizer)
+        self._model = warmup_model(self._model, self._tokenizer, self._prefix_ids, device)
+        self._cache = (
+            EmbeddingCache(Config.EMBED_CACHE_PATH, model_name, variant=precision_tag(self._model))
+            if Config.EMBED_CACHE_PATH else None
+        )
+
         self._dim = 768  # nomic-embed-text-v1.5 output dimension
         logger.info(f"Embedding model loaded, dim={self._dim}")
 
@@ -93,24 +115,32 @@ class SingleThreadEmbedder:
         """L2 normalize embeddings."""
         return torch.nn.functional.normalize(embeddings, p=2, dim=1)
 
-    def embed(self, text: str) -> List[float]:
-        prefixed = "search_document: " + text
-        encoded = self._tokenizer(
-            prefixed,
-            padding=True,
-            truncation=True,
-            max_length=512,
-            return_tensors="pt",
-        ).to(self._device)
-
-        with torch.no_grad():
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one text; returns a float32 array of shape (dim,)."""
+        if self._cache is not None:
+            cached = self._cache.get(text)
+            if cached is not None:
+                return cached
+
+        # Prefix ids were tokenized once at load; only the chunk text is tokenized here
+        encoded = encode_prefixed(self._tokenizer, text, self._prefix_ids, self._device)
+
+        with torch.inference_mode():
             outputs = self._model(**encoded)
             token_embeddings = outputs.last_hidden_state
             pooled = self._mean_pooling(token_embeddings, encoded["attention_mask"])
             normalized = self._normalize_embeddings(pooled)
 
         # Extract first element from batch (shape: [1, dim] -> [dim])
-        return normalized.cpu().tolist()[0]
+        vector = normalized.cpu().numpy().astype(np.float32, copy=False)[0]
+        if self._cache is not None:
+            self._cache.put(text, vector)
+        return vector
+
+    def close(self) -> None:
+        """Flush and close the embedding cache."""
+        if self._cache is not None:
+            self._cache.close()
 
     @property
     def dimension(self) -> int:
@@ -163,6 +193,7 @@ def ingest(
         "start": datetime.now(timezone.utc).isoformat(),
         "end": "",
     }
+    embedder = None
 
     try:
         # Validate
@@ -172,25 +203,16 @@ def ingest(
         logger.info(f"Starting ingestion: {docs_path}")
         logger.info(f"Reset: {reset}, Collection: {collection}")
 
-        # Parse chunks
-        from chunker import parse_file
-        logger.info("Parsing...")
-        all_chunks = parse_file(docs_path)
-        stats["total"] = len(all_chunks)
-        stats["docs"] = len([c for c in all_chunks if c.chunk_type != "code"])
-        stats["code"] = len([c for c in all_chunks if c.chunk_type == "code"])
-        logger.info(f"Parsed {stats['total']} chunks ({stats['docs']} docs, {stats['code']} code)")
-
         # Qdrant client
         url = Config.QDRANT_URL
         api_key = Config.QDRANT_API_KEY
         if url.startswith("http"):
-            client = QdrantClient(url=url, api_key=api_key)
+            client = QdrantClient(url=url, api_key=api_key, prefer_grpc=Config.QDRANT_PREFER_GRPC)
         else:
             client = QdrantClient(path=url)
 
         # Embedder
-        embedder = SingleThreadEmbedder(device=Config.EMBED_DEVICE)
+        embedder = SingleThreadEmbedder(device=select_device())
         vector_dim = embedder.dimension
 
         # Collections
@@ -207,9 +229,11 @@ def ingest(
             if not client.collection_exists(coll):
                 client.create_collection(
                     collection_name=coll,
-                    vectors_config={"dense": VectorParams(size=vector_dim, distance=Distance.COSINE)},
+                    vectors_config={"dense": dense_vector_params(vector_dim)},
                     # Dense vectors only - no sparse_vectors_config
                     optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
+                    hnsw_config=hnsw_config(),
+                    quantization_config=quantization_config(),
                 )
                 logger.info(f"Created: {coll}")
 
@@ -226,95 +250,87 @@ def ingest(
                     ),
                 )
                 logger.info(f"Created full-text index on 'text' field for collection: {coll}")
+            ensure_payload_indexes(client, coll)
+            check_point_id_scheme(client, coll)
 
         # Checkpoint
         checkpoint_dir = Path("./.ingest_checkpoints")
         checkpoint_dir.mkdir(exist_ok=True)
 
-        # Ingest docs
-        docs_chunks = [c for c in all_chunks if c.chunk_type != "code"]
-        if docs_chunks and Config.DOCS_COLLECTION in collections:
-            ckpt = Checkpoint(checkpoint_dir / "docs.json")
-            if reset:
-                ckpt.data = {}
-            start_idx = ckpt.data.get("processed", 0)
-            logger.info(f"Ingesting {len(docs_chunks)} docs chunks (from {start_idx})...")
-
-            upserted = ckpt.data.get("upserted", 0)
-            for i, chunk in enumerate(docs_chunks[start_idx:], start=start_idx):
-                try:
-                    # Embed (one at a time)
-                    dense = embedder.embed(chunk.text)
-
-                    # Point
-                    point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk.chunk_id))
-                    payload = chunk.to_payload()
-
-                    # Upsert (dense only, named vector)
-                    client.upsert(
-                        collection_name=Config.DOCS_COLLECTION,
-                        points=[PointStruct(id=point_id, vector={"dense": dense}, payload=payload)],
-                    )
-                    upserted += 1
-
-                    # Progress
-                    if (i + 1) % 10 == 0:
-                        logger.info(f"  {i + 1}/{len(docs_chunks)} ({(i+1)/len(docs_chunks)*100:.1f}%)")
-                        ckpt.data = {"processed": i + 1, "upserted": upserted}
-                        ckpt.save()
-
-                    # GC
-                    if (i + 1) % 20 == 0:
-                        gc.collect()
-
-                except Exception as e:
-                    stats["failed"] += 1
-                    logger.error(f"Chunk {i} failed: {e}")
-                    continue
-
-            stats["upserted_docs"] = upserted
-            ckpt.delete()
-            logger.info(f"✓ Docs: {upserted}/{len(docs_chunks)}")
-
-        # Ingest code
-        code_chunks = [c for c in all_chunks if c.chunk_type == "code"]
-        if code_chunks and Config.CODE_COLLECTION in collections:
-            ckpt = Checkpoint(checkpoint_dir / "code.json")
+        # Per-collection resume state
+        targets = {}
+        if Config.DOCS_COLLECTION in collections:
+            targets["docs"] = Config.DOCS_COLLECTION
+        if Config.CODE_COLLECTION in collections:
+            targets["code"] = Config.CODE_COLLECTION
+
+        states = {}
+        for kind, coll in targets.items():
+            ckpt = Checkpoint(checkpoint_dir / f"{kind}.json")
             if reset:
                 ckpt.data = {}
-            start_idx = ckpt.data.get("processed", 0)
-            logger.info(f"Ingesting {len(code_chunks)} code chunks (from {start_idx})...")
-
-            upserted = ckpt.data.get("upserted", 0)
-            for i, chunk in enumerate(code_chunks[start_idx:], start=start_idx):
-                try:
-                    dense = embedder.embed(chunk.text)
+            states[kind] = {
+                "collection": coll,
+                "ckpt": ckpt,
+                "start": ckpt.data.get("processed", 0),
+                "seen": 0,
+                "upserted": ckpt.data.get("upserted", 0),
+            }
+            logger.info(f"Ingesting {kind} chunks (from {states[kind]['start']})...")
+
+        # Stream chunks file by file and route each to its collection
+        from chunker import iter_chunks
+        from ingest_utils import ChunkFilter
+        chunk_filter = ChunkFilter()
+        logger.info("Parsing and ingesting...")
+        for chunk in iter_chunks(docs_path):
+            if not chunk_filter.accept(chunk):
+                continue
+            kind = "code" if chunk.chunk_type == "code" else "docs"
+            stats["total"] += 1
+            stats[kind] += 1
+
+            state = states.get(kind)
+            if state is None:
+                continue
+            i = state["seen"]
+            state["seen"] += 1
+            if i < state["start"]:
+                continue
 
-                    point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk.chunk_id))
-                    payload = chunk.to_payload()
-
-                    client.upsert(
-                        collection_name=Config.CODE_COLLECTION,
-                        points=[PointStruct(id=point_id, vector={"dense": dense}, payload=payload)],
-                    )
-                    upserted += 1
-
-                    if (i + 1) % 10 == 0:
-                        logger.info(f"  {i + 1}/{len(code_chunks)}")
-                        ckpt.data = {"processed": i + 1, "upserted": upserted}
-                        ckpt.save()
-
-                    if (i + 1) % 20 == 0:
-                        gc.collect()
+            try:
+                # Embed (one at a time)
+                dense = embedder.embed(chunk.text)
 
-                except Exception as e:
-                    stats["failed"] += 1
-                    logger.error(f"Code chunk {i} failed: {e}")
-                    continue
+                # Point
+                pid = point_id(chunk.chunk_id)
+                payload = chunk.to_payload()
 
-            stats["upserted_code"] = upserted
-            ckpt.delete()
-            logger.info(f"✓ Code: {upserted}/{len(code_chunks)}")
+                # Upsert (dense only, named vector)
+                client.upsert(
+                    collection_name=state["collection"],
+                    points=[PointStruct(id=pid, vector={"dense": dense.tolist()}, payload=payload)],
+                )
+                state["upserted"] += 1
+
+                # Progress
+                if (i + 1) % 10 == 0:
+                    logger.info(f"  {kind}: {i + 1} ({stats['total']} parsed)")
+                    state["ckpt"].data = {"processed": i + 1, "upserted": state["upserted"]}
+                    state["ckpt"].save()
+
+            except Exception as e:
+                stats["failed"] += 1
+                logger.error(f"{kind.capitalize()} chunk {i} failed: {e}")
+                continue
+
+        for kind, state in states.items():
+            stats[f"upserted_{kind}"] = state["upserted"]
+            state["ckpt"].delete()
+            logger.info(f"✓ {kind.capitalize()}: {state['upserted']}/{state['seen']}")
+            enable_indexing(state["collection"], client)
+        gc.collect()
+        logger.info(f"Filtered: {chunk_filter.summary()}")
 
         stats["end"] = datetime.now(timezone.utc).isoformat()
         logger.info("="*50)
@@ -329,6 +345,9 @@ def ingest(
         logger.error(f"Failed: {e}")
         logger.error(traceback.format_exc())
         return {"ok": False, "error": str(e), "stats": stats}
+    finally:
+        if embedder is not None:
+            embedder.close()
 
 
 # ---------------------------------------------------------------------------
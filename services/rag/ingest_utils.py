@@ -11,19 +11,30 @@ Features:
 
 from __future__ import annotations
 
+import atexit
+import gc
 import hashlib
 import json
 import logging
 import os
+import random
+import re
 import sys
+import threading
 import time
 import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Generator, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 from config import Config
+import json_utils
 
 log = logging.getLogger(__name__)
 
@@ -41,7 +52,7 @@ class Checkpoint:
     failed_items: int = 0
     last_chunk_id: str = ""
     last_updated: str = ""
-    errors: List[str] = field(default_factory=list)
+    errors: Deque[str] = field(default_factory=lambda: deque(maxlen=10))  # last 10 only
     start_time: str = ""
     end_time: str = ""
     status: str = "pending"  # pending, running, completed, failed
@@ -54,7 +65,7 @@ class Checkpoint:
             "failed_items": self.failed_items,
             "last_chunk_id": self.last_chunk_id,
             "last_updated": self.last_updated,
-            "errors": self.errors[-10:],  # Keep last 10 errors
+            "errors": list(self.errors),
             "start_time": self.start_time,
             "end_time": self.end_time,
             "status": self.status,
@@ -69,19 +80,54 @@ class Checkpoint:
             failed_items=data.get("failed_items", 0),
             last_chunk_id=data.get("last_chunk_id", ""),
             last_updated=data.get("last_updated", ""),
-            errors=data.get("errors", []),
+            errors=deque(data.get("errors", []), maxlen=10),
             start_time=data.get("start_time", ""),
             end_time=data.get("end_time", ""),
             status=data.get("status", "pending"),
         )
 
 
+# Human-readable checkpoint files for debugging; compact JSON otherwise
+_PRETTY_CHECKPOINTS = bool(os.getenv("INGEST_PRETTY_CKPT"))
+
+# Minimum seconds between checkpoint writes per collection (0 disables debounce)
+_CHECKPOINT_MIN_INTERVAL = float(os.getenv("INGEST_CHECKPOINT_MIN_SECONDS", "2.0"))
+
+
 class CheckpointManager:
-    """Manages checkpoint files for crash recovery."""
+    """
+    Manages checkpoint files for crash recovery.
+
+    Saves are handed to a single background writer thread so the ingestion
+    loop never blocks on disk I/O. Back-to-back saves for the same
+    collection coalesce (only the newest state is written), and each wake-up
+    drains every pending collection in one pass. Each write goes to a temp
+    file followed by `os.replace`, so a crash never leaves a truncated
+    checkpoint.
+
+    Saves are also debounced: a collection is written at most once per
+    `min_interval` seconds, newer states are held in memory until then, and
+    `save(..., force=True)` writes immediately. `flush()` (also run at exit)
+    writes everything that is still held.
+    """
 
-    def __init__(self, checkpoint_dir: str = "./.ingest_checkpoints"):
+    def __init__(
+        self,
+        checkpoint_dir: str = "./.ingest_checkpoints",
+        min_interval: float = _CHECKPOINT_MIN_INTERVAL,
+    ):
         self.checkpoint_dir = Path(checkpoint_dir)
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.min_interval = min_interval
+
+        self._pending: Dict[str, dict] = {}
+        self._held: Dict[str, dict] = {}
+        self._last_write: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._thread = threading.Thread(target=self._writer, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
 
     def _checkpoint_path(self, collection: str) -> Path:
         """Get checkpoint file path for a collection."""
@@ -94,40 +140,85 @@ class CheckpointManager:
         if not path.exists():
             return None
         try:
-            data = json.loads(path.read_text(encoding="utf-8"))
+            data = json_utils.loads(path.read_bytes())
             return Checkpoint.from_dict(data)
         except Exception as e:
             log.warning(f"Failed to load checkpoint for {collection}: {e}")
             return None
 
-    def save(self, checkpoint: Checkpoint) -> None:
-        """Save checkpoint for a collection."""
+    def save(self, checkpoint: Checkpoint, force: bool = False) -> None:
+        """Queue a checkpoint write for a collection (non-blocking, debounced unless force)."""
         checkpoint.last_updated = datetime.now(timezone.utc).isoformat()
-        path = self._checkpoint_path(checkpoint.collection)
-        path.write_text(json.dumps(checkpoint.to_dict(), indent=2), encoding="utf-8")
+        collection = checkpoint.collection
+        now = time.monotonic()
+        with self._cond:
+            # Snapshot now; the caller keeps mutating the Checkpoint
+            data = checkpoint.to_dict()
+            if not force and now - self._last_write.get(collection, 0.0) < self.min_interval:
+                self._held[collection] = data
+                return
+            self._held.pop(collection, None)
+            self._pending[collection] = data
+            self._last_write[collection] = now
+            self._cond.notify()
+
+    def flush(self) -> None:
+        """Write any held saves and block until all queued writes have reached disk."""
+        with self._cond:
+            if self._held:
+                self._pending.update(self._held)
+                self._held.clear()
+                self._cond.notify()
+            self._cond.wait_for(lambda: not self._pending and not self._busy)
+
+    def close(self) -> None:
+        """Flush outstanding checkpoints; registered with atexit."""
+        self.flush()
+
+    def _write(self, collection: str, data: dict) -> None:
+        path = self._checkpoint_path(collection)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(json_utils.dumps(data, pretty=_PRETTY_CHECKPOINTS))
+        os.replace(tmp, path)
+
+    def _writer(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                batch = list(self._pending.items())
+                self._pending.clear()
+                self._busy = True
+            try:
+                for collection, data in batch:
+                    try:
+                        self._write(collection, data)
+                    except Exception as e:
+                        log.warning(f"Failed to write checkpoint for {collection}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
 
     def delete(self, collection: str) -> None:
         """Delete checkpoint after successful completion."""
         path = self._checkpoint_path(collection)
-        if path.exists():
-            path.unlink()
+        with self._cond:
+            self._pending.pop(collection, None)
+            self._held.pop(collection, None)
+            self._cond.wait_for(lambda: not self._busy)  # let an in-flight write land first
+            if path.exists():
+                path.unlink()
 
     def cleanup_old(self, max_age_hours: int = 24) -> None:
-        """Remove checkpoints older than max_age_hours."""
-        now = datetime.now(timezone.utc)
+        """Remove checkpoints older than max_age_hours (by file mtime; every save rewrites the file)."""
+        cutoff_ts = (datetime.now(timezone.utc) - timedelta(hours=max_age_hours)).timestamp()
         for path in self.checkpoint_dir.glob("*.json"):
             try:
-                data = json.loads(path.read_text(encoding="utf-8"))
-                last_updated = data.get("last_updated", "")
-                if last_updated:
-                    # Handle both timezone-aware and naive datetime strings
-                    last_time = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-                    if last_time.tzinfo is None:
-                        last_time = last_time.replace(tzinfo=timezone.utc)
-                    age = now - last_time
-                    if age > timedelta(hours=max_age_hours):
-                        path.unlink()
-                        log.info(f"Cleaned up old checkpoint: {path.name}")
+                if path.stat().st_mtime < cutoff_ts:
+                    path.unlink()
+                    log.info(f"Cleaned up old checkpoint: {path.name}")
+            except FileNotFoundError:
+                pass
             except Exception as e:
                 log.warning(f"Failed to cleanup checkpoint {path.name}: {e}")
 
@@ -138,12 +229,12 @@ class CheckpointManager:
 
 @dataclass
 class ProgressTracker:
-    """Tracks and reports ingestion progress."""
+    """Tracks and reports ingestion progress (monotonic clock)."""
     total: int
     processed: int = 0
     failed: int = 0
-    start_time: float = field(default_factory=time.time)
-    last_report: float = field(default_factory=time.time)
+    start_monotonic: float = field(default_factory=time.monotonic)
+    last_report: float = field(default_factory=time.monotonic)
     batch_size: int = 64
 
     def update(self, count: int = 1, failed: bool = False) -> None:
@@ -153,42 +244,46 @@ class ProgressTracker:
         else:
             self.processed += count
 
-    def eta(self) -> Optional[str]:
-        """Estimate time remaining."""
-        if self.processed == 0:
-            return None
-        elapsed = time.time() - self.start_time
-        rate = self.processed / elapsed
+    def _rate(self, now: float) -> Tuple[float, float]:
+        """Return (elapsed seconds, items/s) as of `now`."""
+        elapsed = now - self.start_monotonic
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        return elapsed, rate
+
+    def _eta(self, rate: float) -> Optional[str]:
         remaining = self.total - self.processed - self.failed
         if rate > 0 and remaining > 0:
-            eta_seconds = remaining / rate
-            return str(timedelta(seconds=int(eta_seconds)))
+            return str(timedelta(seconds=int(remaining / rate)))
         return None
 
+    def eta(self, now: Optional[float] = None) -> Optional[str]:
+        """Estimate time remaining."""
+        _, rate = self._rate(time.monotonic() if now is None else now)
+        return self._eta(rate)
+
     def progress_percent(self) -> float:
         """Return progress as percentage."""
         if self.total == 0:
             return 0.0
         return (self.processed / self.total) * 100
 
-    def should_report(self, interval_seconds: float = 10.0) -> bool:
+    def should_report(self, interval_seconds: float = 10.0, now: Optional[float] = None) -> bool:
         """Check if it's time to report progress."""
-        now = time.time()
+        if now is None:
+            now = time.monotonic()
         if now - self.last_report >= interval_seconds:
             self.last_report = now
             return True
         return False
 
-    def report(self, prefix: str = "") -> str:
+    def report(self, prefix: str = "", now: Optional[float] = None) -> str:
         """Generate progress report string."""
-        pct = self.progress_percent()
-        eta_str = self.eta()
-        elapsed = str(timedelta(seconds=int(time.time() - self.start_time)))
-        rate = self.processed / (time.time() - self.start_time) if self.processed > 0 else 0
+        elapsed, rate = self._rate(time.monotonic() if now is None else now)
+        eta_str = self._eta(rate)
 
         report = (
-            f"{prefix}Progress: {self.processed}/{self.total} ({pct:.1f}%) | "
-            f"Elapsed: {elapsed} | "
+            f"{prefix}Progress: {self.processed}/{self.total} ({self.progress_percent():.1f}%) | "
+            f"Elapsed: {timedelta(seconds=int(elapsed))} | "
             f"Rate: {rate:.1f} items/s"
         )
         if eta_str:
@@ -203,37 +298,64 @@ class ProgressTracker:
 # ---------------------------------------------------------------------------
 
 def batch_generator(
-    items: List[Any],
+    items: Iterable[Any],
     batch_size: int = 64,
     max_batches_before_gc: int = 100,
 ) -> Generator[List[Any], None, None]:
     """
-    Generate batches from a list with optional GC hints.
+    Generate batches from any iterable, collecting garbage periodically.
 
-    Yields batches of size batch_size. After max_batches_before_gc batches,
-    yields None to signal a good time for garbage collection.
+    Yields lists of up to batch_size items, pulled lazily with islice so
+    callers can pass generators without materializing them. Every
+    max_batches_before_gc batches, runs gc.collect() before the next batch.
     """
-    batch = []
+    it = iter(items)
     batch_count = 0
 
-    for item in items:
-        batch.append(item)
-        if len(batch) >= batch_size:
-            yield batch
-            batch = []
-            batch_count += 1
-            if batch_count >= max_batches_before_gc:
-                batch_count = 0
-                yield []  # Signal for GC
-
-    if batch:
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
         yield batch
+        batch_count += 1
+        if batch_count >= max_batches_before_gc:
+            batch_count = 0
+            gc.collect()
+
+
+def process_with_concurrency(
+    items: Iterable[Any],
+    worker_fn: Callable[[Any], Any],
+    limit: int = Config.INGEST_CONCURRENCY,
+) -> List[Any]:
+    """
+    Run worker_fn over items on up to `limit` threads.
+
+    Returns results in input order. At most 2 * limit items are submitted
+    ahead of the oldest unfinished one, so generators are consumed lazily.
+    The first worker exception is re-raised once in-flight work finishes.
+    """
+    limit = max(1, limit)
+    results: List[Any] = []
+    in_flight: Deque = deque()
+    with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="ingest-worker") as pool:
+        for item in items:
+            if len(in_flight) >= 2 * limit:
+                results.append(in_flight.popleft().result())
+            in_flight.append(pool.submit(worker_fn, item))
+        while in_flight:
+            results.append(in_flight.popleft().result())
+    return results
 
 
 # ---------------------------------------------------------------------------
 # Retry logic with exponential backoff
 # ---------------------------------------------------------------------------
 
+# Non-cryptographic jitter source; avoids a getrandom syscall per retry
+_JITTER_RNG = random.Random()
+
+
 def retry_with_backoff(
     func: Callable,
     max_retries: int = 3,
@@ -270,8 +392,8 @@ def retry_with_backoff(
                 break
 
             delay = min(base_delay * (exponential_base ** attempt), max_delay)
-            # Add jitter (±10%)
-            jitter = delay * 0.1 * (0.5 - os.urandom(1)[0] / 255)
+            # Add jitter (±5%, the range the urandom-based version produced)
+            jitter = delay * 0.1 * (0.5 - _JITTER_RNG.random())
             delay_with_jitter = delay + jitter
 
             log.warning(
@@ -288,7 +410,23 @@ def retry_with_backoff(
 # ---------------------------------------------------------------------------
 
 def get_memory_usage_mb() -> float:
-    """Get current memory usage in MB."""
+    """
+    Get current resident memory in MB.
+
+    Reads /proc/self/statm on Linux, then psutil if installed. Falls back to
+    ru_maxrss, which is the peak since start rather than current usage.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            rss_pages = int(f.read().split()[1])
+        return rss_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        pass
     try:
         import resource
         # Returns memory usage in KB on Linux/macOS
@@ -319,21 +457,29 @@ def check_memory_threshold(threshold_mb: float = 1024.0) -> bool:
 # Chunk ID validation
 # ---------------------------------------------------------------------------
 
+_HEX_ID_RE = re.compile(r"[0-9a-fA-F]{8,}")  # At least 8 hex chars
+
+
 def validate_chunk_id(chunk_id: str) -> bool:
     """Validate that a chunk_id is a valid hex string."""
-    if not chunk_id or not isinstance(chunk_id, str):
-        return False
-    try:
-        int(chunk_id, 16)
-        return len(chunk_id) >= 8  # At least 8 hex chars
-    except ValueError:
-        return False
+    return isinstance(chunk_id, str) and _HEX_ID_RE.fullmatch(chunk_id) is not None
+
 
+_ID_SEP = b"|"
 
-def generate_chunk_id(text: str, metadata: dict) -> str:
-    """Generate a deterministic chunk ID from text and metadata."""
-    content = f"{text}|{json.dumps(metadata, sort_keys=True)}"
-    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+def generate_chunk_id(text: str | bytes, metadata: dict) -> str:
+    """
+    Generate a deterministic chunk ID from text and metadata.
+
+    `text` may be passed pre-encoded as UTF-8 bytes.
+    """
+    h = hashlib.blake2b(digest_size=8)  # 16 hex chars, no truncation needed
+    h.update(text.encode("utf-8") if isinstance(text, str) else text)
+    h.update(_ID_SEP)
+    # stdlib json, not json_utils: the ID must not depend on whether orjson is installed
+    h.update(json.dumps(metadata, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return h.hexdigest()
 
 
 # ---------------------------------------------------------------------------
@@ -400,29 +546,63 @@ def validate_chunk_data(chunk: Any) -> Tuple[bool, List[str]]:
     Returns:
         Tuple of (is_valid, list of error messages)
     """
+    # One attribute lookup per field; format checks only run on present values
+    text = getattr(chunk, "text", None)
+    chunk_id = getattr(chunk, "chunk_id", None)
+    chunk_type = getattr(chunk, "chunk_type", None)
     errors = []
 
-    # Check required fields
-    if not hasattr(chunk, 'text') or not chunk.text:
+    if not text:
         errors.append("Missing or empty 'text' field")
+    elif len(text) > 100_000:  # 100KB limit
+        errors.append(f"Text too long: {len(text)} chars")
 
-    if not hasattr(chunk, 'chunk_id') or not chunk.chunk_id:
+    if not chunk_id:
         errors.append("Missing or empty 'chunk_id' field")
+    elif not validate_chunk_id(chunk_id):
+        errors.append(f"Invalid chunk_id format: {chunk_id}")
 
-    if not hasattr(chunk, 'chunk_type') or not chunk.chunk_type:
+    if not chunk_type:
         errors.append("Missing or empty 'chunk_type' field")
 
-    # Validate text length
-    if hasattr(chunk, 'text') and chunk.text:
-        if len(chunk.text) > 100000:  # 100KB limit
-            errors.append(f"Text too long: {len(chunk.text)} chars")
+    return (not errors, errors)
 
-    # Validate chunk_id format
-    if hasattr(chunk, 'chunk_id') and chunk.chunk_id:
-        if not validate_chunk_id(chunk.chunk_id):
-            errors.append(f"Invalid chunk_id format: {chunk.chunk_id}")
 
-    return (len(errors) == 0, errors)
+class ChunkFilter:
+    """
+    Screens chunks before the forward pass.
+
+    Chunks below `min_chars` of stripped text are skipped, but only when
+    INGEST_MIN_CHUNK_CHARS is set (short code and redirect chunks are real
+    content, so the default is 0), and each skip is logged. Exact-text
+    duplicates are counted, not dropped: every document keeps its own point
+    and payload, and the embedding cache serves the repeated vector.
+    Decisions depend only on the chunk stream, so checkpoint indices stay
+    stable across resumes.
+    """
+
+    def __init__(self, min_chars: int = int(os.getenv("INGEST_MIN_CHUNK_CHARS", "0"))):
+        self.min_chars = min_chars
+        self._seen: set = set()
+        self.short = 0
+        self.duplicates = 0
+
+    def accept(self, chunk: Any) -> bool:
+        """Return True if the chunk should be embedded and indexed."""
+        text = chunk.text
+        if self.min_chars and len(text.strip()) < self.min_chars:
+            self.short += 1
+            log.info(f"Skipping short chunk {chunk.chunk_id} ({len(text.strip())} chars)")
+            return False
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        if key in self._seen:
+            self.duplicates += 1
+        else:
+            self._seen.add(key)
+        return True
+
+    def summary(self) -> str:
+        return f"skipped {self.short} short chunks, indexed {self.duplicates} duplicate texts"
 
 
 def validate_embedding(vector: List[float], expected_dim: int) -> Tuple[bool, str]:
@@ -432,16 +612,24 @@ def validate_embedding(vector: List[float], expected_dim: int) -> Tuple[bool, st
     Returns:
         Tuple of (is_valid, error message)
     """
-    if not vector:
+    if vector is None:
+        return (False, "Empty vector")
+    try:
+        arr = np.asarray(vector, dtype=np.float32)
+    except (TypeError, ValueError) as e:
+        return (False, f"Not a numeric vector: {e}")
+    if arr.ndim != 1:
+        return (False, f"Expected a 1-D vector, got shape {arr.shape}")
+    if arr.size == 0:
         return (False, "Empty vector")
 
-    if len(vector) != expected_dim:
-        return (False, f"Dimension mismatch: expected {expected_dim}, got {len(vector)}")
+    if arr.size != expected_dim:
+        return (False, f"Dimension mismatch: expected {expected_dim}, got {arr.size}")
 
-    # Check for NaN or Inf
-    import math
-    for i, val in enumerate(vector):
-        if math.isnan(val) or math.isinf(val):
-            return (False, f"Invalid value at index {i}: {val}")
+    # Check for NaN or Inf in one vectorized pass; locate the index only on failure
+    bad = ~np.isfinite(arr)
+    if bad.any():
+        i = int(bad.argmax())
+        return (False, f"Invalid value at index {i}: {arr[i]}")
 
     return (True, "")
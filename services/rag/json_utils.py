@@ -0,0 +1,40 @@
+"""
+JSON helpers shared by the ingestion scripts and the retriever.
+
+Uses orjson when it is installed and falls back to the stdlib otherwise.
+Both produce valid JSON that round-trips through `loads`, but the bytes are
+not identical between backends: floats are formatted differently (`1e-05`
+vs `1e-5`), NaN/Inf become `null` under orjson, and orjson rejects non-str
+dict keys with TypeError. Don't hash or compare the serialized output.
+"""
+
+from __future__ import annotations
+import json
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# orjson.JSONDecodeError and json.JSONDecodeError are both ValueErrors;
+# TypeError covers non-str/bytes input
+JSON_ERRORS = (ValueError, TypeError)
+
+
+def dumps(obj: Any, sort_keys: bool = False, pretty: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (compact unless `pretty`, non-ASCII unescaped)."""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, sort_keys=sort_keys, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+loads = orjson.loads if ORJSON_AVAILABLE else json.loads
@@ -0,0 +1,119 @@
+"""
+In-process LRU + TTL cache for retrieval results.
+
+Repeat questions are common for a Slack bot (the same FAQ asked by
+different people), so identical searches are answered from memory without
+an embedder forward or a Qdrant round-trip.
+
+Keys are blake2b digests of (collection, queries, top_k, filter). Entries
+expire after QUERY_CACHE_TTL seconds and the least recently used entry is
+evicted beyond QUERY_CACHE_SIZE. `indexer` clears the cache whenever points
+are upserted or a collection is recreated in this process; ingestion in
+another process is covered by the TTL.
+"""
+
+from __future__ import annotations
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional, Tuple
+
+from config import Config
+
+
+class LRUTTLCache:
+    """
+    Thread-safe LRU cache with per-entry TTL (monotonic clock).
+
+    Values are stored and returned as they are; see QueryCache for the
+    copying variant. Also backs embed_cache.LRUEmbeddingCache.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[bytes, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Return the cached value, or None on a miss/expiry."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: bytes, value: Any) -> None:
+        """Store `value` under `key`, evicting the least recently used beyond max_size."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "max_size": self.max_size, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses}
+
+
+class QueryCache(LRUTTLCache):
+    """Retrieval-result cache: keyed by search parameters, values copied in and out."""
+
+    def __init__(self, max_size: int = Config.QUERY_CACHE_SIZE, ttl: float = Config.QUERY_CACHE_TTL):
+        super().__init__(max_size, ttl)
+
+    @staticmethod
+    def make_key(collection: str, queries: Iterable[str], top_k: int, payload_filter: Any = None) -> bytes:
+        filter_json = payload_filter.model_dump_json() if payload_filter is not None else ""
+        raw = "\x1f".join(queries)
+        return hashlib.blake2b(
+            f"{collection}|{raw}|{top_k}|{filter_json}".encode("utf-8"), digest_size=16
+        ).digest()
+
+    def get(self, key: bytes) -> Optional[List[Any]]:
+        """Return shallow copies of the cached results, or None on a miss/expiry."""
+        values = super().get(key)
+        if values is None:
+            return None
+        # Callers may adjust scores in place; never hand out the cached objects
+        return [copy.copy(v) for v in values]
+
+    def put(self, key: bytes, values: List[Any]) -> None:
+        """Store copies of `values` under `key`."""
+        if self.enabled:
+            super().put(key, tuple(copy.copy(v) for v in values))
+
+
+_CACHE = QueryCache()
+
+
+def get_cache() -> QueryCache:
+    """Return the process-wide retrieval cache."""
+    return _CACHE
+
+
+def cache_clear() -> None:
+    """Drop every cached retrieval result (called by indexer on writes)."""
+    _CACHE.clear()
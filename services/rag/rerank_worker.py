@@ -0,0 +1,193 @@
+"""
+Dedicated cross-encoder process for the RAG service (RERANK_WORKER=true).
+
+One child process owns the reranker model. Server threads submit
+(query, passages) requests over a multiprocessing queue; the child waits up
+to RERANK_BATCH_WINDOW_MS after the first request for more to arrive, then
+scores every queued pair in a single length-sorted forward and returns each
+request's slice. Concurrent queries therefore share batches, and inference
+runs outside the server process's GIL.
+
+Flow:
+  server thread ──(req_id, query, passages)──▶ request queue ─▶ worker
+  server thread ◀── Future ◀── dispatcher thread ◀── response queue ◀─┘
+
+The process is started lazily on first use (spawn context, so no torch
+state is forked) and stopped at interpreter exit. Requests made while the
+worker is still loading its model wait for it to become ready. If anything
+here fails, `reranker.rerank` returns bi-encoder order rather than loading a
+second copy of the model in the server process.
+"""
+
+from __future__ import annotations
+import atexit
+import itertools
+import logging
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeout
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+_READY = "__ready__"
+
+_lock = threading.Lock()
+_proc: Optional[mp.Process] = None
+_requests = None
+_responses = None
+_futures: Dict[int, Future] = {}
+_ids = itertools.count()
+_ready = threading.Event()
+
+
+# ---------------------------------------------------------------------------
+# Child process
+# ---------------------------------------------------------------------------
+
+def _serve(requests, responses, window_s: float, max_batch: int) -> None:
+    """Worker loop: coalesce requests within the window, score them together."""
+    from reranker import _get_reranker, _score_pairs, limit_torch_threads
+
+    limit_torch_threads()
+    _get_reranker()
+    responses.put((_READY, None))
+
+    while True:
+        first = requests.get()
+        if first is None:
+            return
+        batch = [first]
+        n_pairs = len(first[2])
+        deadline = time.monotonic() + window_s
+        while n_pairs < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = requests.get(timeout=remaining)
+            except Exception:
+                break
+            if item is None:
+                requests.put(None)  # re-queue shutdown for after this batch
+                break
+            batch.append(item)
+            n_pairs += len(item[2])
+
+        pairs = [(query, p) for _, query, passages in batch for p in passages]
+        try:
+            scores = _score_pairs(pairs)
+        except Exception as e:
+            for req_id, _, _ in batch:
+                responses.put((req_id, e))
+            continue
+
+        offset = 0
+        for req_id, _, passages in batch:
+            responses.put((req_id, scores[offset : offset + len(passages)]))
+            offset += len(passages)
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+def _dispatch(responses) -> None:
+    """Resolve pending futures as the worker replies (None stops the thread)."""
+    while True:
+        try:
+            item = responses.get()
+        except (EOFError, OSError):
+            return
+        if item is None:
+            return
+        req_id, result = item
+        if req_id == _READY:
+            _ready.set()
+            log.info("Rerank worker ready ✓")
+            continue
+        future = _futures.pop(req_id, None)
+        if future is None:
+            continue
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+def _ensure_started() -> None:
+    global _proc, _requests, _responses
+    with _lock:
+        if _proc is not None and _proc.is_alive():
+            return
+        # Respawn: the new process must report ready again, and the previous
+        # dispatcher is stopped rather than left reading the dead worker's queue
+        _ready.clear()
+        if _responses is not None:
+            _responses.put(None)
+        ctx = mp.get_context("spawn")
+        _requests = ctx.Queue()
+        _responses = ctx.Queue()
+        _proc = ctx.Process(
+            target=_serve,
+            args=(_requests, _responses, Config.RERANK_BATCH_WINDOW_MS / 1000.0, Config.RERANK_MAX_BATCH),
+            name="rerank-worker",
+            daemon=True,
+        )
+        _proc.start()
+        threading.Thread(target=_dispatch, args=(_responses,), name="rerank-dispatch", daemon=True).start()
+        log.info(f"Started rerank worker (pid={_proc.pid})")
+
+
+def start() -> None:
+    """Start the worker process (idempotent); used for pre-warming."""
+    _ensure_started()
+
+
+def score(query: str, passages: List[str], timeout: float = 30.0, load_timeout: float = 300.0) -> np.ndarray:
+    """
+    Score passages against query in the worker process.
+
+    Waits up to `load_timeout` for the worker's first model load before the
+    per-request `timeout` starts counting.
+    """
+    _ensure_started()
+    load_deadline = time.monotonic() + load_timeout
+    while not _ready.wait(0.5):
+        if not _proc.is_alive():
+            raise RuntimeError("rerank worker exited before loading its model")
+        if time.monotonic() >= load_deadline:
+            raise FuturesTimeout("rerank worker still loading its model")
+    req_id = next(_ids)
+    future: Future = Future()
+    _futures[req_id] = future
+    _requests.put((req_id, query, passages))
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except FuturesTimeout:
+                if not _proc.is_alive():
+                    raise RuntimeError("rerank worker exited") from None
+                if time.monotonic() >= deadline:
+                    raise
+    finally:
+        _futures.pop(req_id, None)
+
+
+def is_ready() -> bool:
+    """Return True once the worker has loaded its model."""
+    return _ready.is_set() and _proc is not None and _proc.is_alive()
+
+
+@atexit.register
+def _shutdown() -> None:
+    if _proc is not None and _proc.is_alive():
+        _requests.put(None)
+        _proc.join(timeout=5)
@@ -9,28 +9,139 @@ Flow:
   bi-encoder retrieves top-20 (fast, approximate)
       → cross-encoder re-ranks to top-6 (precise)
 
-The model is loaded once and cached — warm time ~1s on CPU.
+The model is loaded once and cached — warm time ~1s on CPU. With
+RERANK_BACKEND=onnx (default) it runs as a dynamically INT8-quantized ONNX
+Runtime graph, falling back to the PyTorch CrossEncoder when optimum is
+not installed. With RERANK_WORKER=true, scoring runs in a dedicated
+process that coalesces concurrent queries into shared batches (see
+rerank_worker.py); if the worker fails, results keep bi-encoder order.
 """
 
 from __future__ import annotations
 import logging
+import os
 from functools import lru_cache
-from typing import List
+from typing import List, Tuple
+
+import numpy as np
+
+from config import Config
 
 log = logging.getLogger(__name__)
 
 RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 
 
+class _OnnxCrossEncoder:
+    """
+    INT8 ONNX Runtime cross-encoder with the subset of the CrossEncoder API
+    used by `rerank` (`tokenizer` and `predict`). Scores go through the same
+    sigmoid CrossEncoder applies to single-label models, so they stay on the
+    same 0–1 scale.
+    """
+
+    def __init__(self, session_model, tokenizer):
+        self._model = session_model
+        self.tokenizer = tokenizer
+
+    def predict(self, pairs, batch_size: int = 32, show_progress_bar: bool = False, convert_to_numpy: bool = True):
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start : start + batch_size]
+            encoded = self.tokenizer(
+                [q for q, _ in batch],
+                [p for _, p in batch],
+                padding=True,
+                truncation=True,
+                max_length=512,
+                return_tensors="np",
+            )
+            logits = self._model(**encoded).logits
+            scores.append(np.asarray(logits, dtype=np.float32)[:, 0])
+        logits = np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+        return 1.0 / (1.0 + np.exp(-logits))
+
+
 @lru_cache(maxsize=1)
+def limit_torch_threads() -> None:
+    """
+    One intra-op thread per physical core, no inter-op pool.
+
+    Process-wide, so only the dedicated rerank worker calls this (before any
+    torch work); in the server it would also throttle the embedder. The ONNX
+    backend sizes its own session instead (embed_onnx._session_options).
+    """
+    import torch
+
+    torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))  # cpu_count counts hyperthreads
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # only settable before the first inter-op parallel call
+
+
 def _get_reranker():
-    from sentence_transformers import CrossEncoder
     log.info(f"Loading cross-encoder: {RERANK_MODEL}")
+    if Config.RERANK_BACKEND == "onnx":
+        from embed_onnx import load_onnx_reranker
+
+        session_model = load_onnx_reranker(RERANK_MODEL)
+        if session_model is not None:
+            from transformers import AutoTokenizer
+
+            model = _OnnxCrossEncoder(session_model, AutoTokenizer.from_pretrained(RERANK_MODEL))
+            log.info("Cross-encoder loaded (ONNX INT8) ✓")
+            return model
+
+    from sentence_transformers import CrossEncoder
+
     model = CrossEncoder(RERANK_MODEL, max_length=512)
+    model.model.eval()
     log.info("Cross-encoder loaded ✓")
     return model
 
 
+_PREDICT_BATCH = 32
+
+
+def _predict(model, pairs: List[Tuple[str, str]]) -> np.ndarray:
+    import torch
+    with torch.inference_mode():
+        scores = model.predict(
+            pairs,
+            batch_size=_PREDICT_BATCH,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+    return np.asarray(scores, dtype=np.float32)
+
+
+def _score_pairs(pairs: List[Tuple[str, str]]) -> np.ndarray:
+    """
+    Cross-encoder scores for (query, passage) pairs, in input order.
+
+    A typical rerank pool fits in one batch and is scored in a single
+    forward as given. Larger inputs (coalesced worker batches) are scored in
+    token-length order so each batch pads to a similar length, then
+    scattered back to their original positions.
+    """
+    model = _get_reranker()
+    if len(pairs) <= _PREDICT_BATCH:
+        # One padded batch either way: sorting would only add a tokenizer pass
+        return _predict(model, pairs)
+
+    lengths = [
+        len(ids) for ids in model.tokenizer(
+            [q for q, _ in pairs], [p for _, p in pairs], truncation=True, max_length=512
+        )["input_ids"]
+    ]
+    order = sorted(range(len(pairs)), key=lengths.__getitem__)
+    sorted_scores = _predict(model, [pairs[i] for i in order])
+    scores = np.empty(len(pairs), dtype=np.float32)
+    scores[order] = sorted_scores
+    return scores
+
+
 def rerank(
     query: str,
     results: List[dict],
@@ -51,21 +162,25 @@ def rerank(
         return []
 
     try:
-        model = _get_reranker()
-        pairs = [(query, r.get("text", "")[:512]) for r in results]
-        scores = model.predict(pairs).tolist()
-
-        # Attach cross-encoder score and sort descending
-        scored = sorted(
-            zip(scores, results),
-            key=lambda x: x[0],
-            reverse=True,
-        )
+        passages = [r.get("text", "")[:512] for r in results]
+        if Config.RERANK_WORKER:
+            # No in-process fallback: that would load a second copy of the model
+            import rerank_worker
+            scores = rerank_worker.score(query, passages)
+        else:
+            scores = _score_pairs([(query, p) for p in passages])
+
+        # Top-k by score: partial selection, then order only the k winners
+        if top_k < len(scores):
+            top = np.argpartition(-scores, top_k)[:top_k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+        else:
+            top = np.argsort(-scores, kind="stable")
 
         reranked = []
-        for score, result in scored[:top_k]:
-            r = dict(result)
-            r["score"] = float(score)   # overwrite bi-encoder score
+        for i in top:
+            r = dict(results[i])
+            r["score"] = float(scores[i])   # overwrite bi-encoder score
             r["reranked"] = True
             reranked.append(r)
 
@@ -76,6 +191,24 @@ def rerank(
         return results[:top_k]
 
 
+def warm() -> None:
+    """
+    Load the cross-encoder (or start the rerank worker) ahead of the first rerank.
+
+    With RERANK_WORKER=true nothing is loaded in-process: rerank() only ever
+    scores in the worker, so a failed start is raised and shows up as
+    not-ready in is_ready() / /health.
+    """
+    if Config.RERANK_WORKER:
+        import rerank_worker
+        rerank_worker.start()
+        return
+    _get_reranker()
+
+
 def is_ready() -> bool:
-    """Return True if the cross-encoder model is already loaded."""
+    """Return True if the cross-encoder model is loaded where rerank() scores (worker or in-process)."""
+    if Config.RERANK_WORKER:
+        import rerank_worker
+        return rerank_worker.is_ready()
     return _get_reranker.cache_info().currsize > 0
@@ -1,41 +1,84 @@
 """
 Dense retrieval with Qdrant full-text index.
 
-Query/Retrieval strategy:
+Query/Retrieval strategy (per query; all queries of a request are embedded
+and searched together in batched calls):
   1. Run dense search with a full-text MatchText keyword pre-filter on the text field
   2. If that returns zero results, fall back to pure dense search with no filter
-  3. Return top-K from whichever path succeeds
+  3. Fuse the per-query result lists with reciprocal-rank fusion, return top-K
 
 No sparse vectors, no BM25, no fastembed.
 """
 
 from __future__ import annotations
+import heapq
 import logging
-from typing import Dict, List, Optional
+import operator
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
 
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
-    Filter, FieldCondition, MatchValue, MatchText,
+    Filter, FieldCondition, MatchAny, MatchValue, MatchText, PayloadSelectorInclude, QueryRequest,
 )
 
 from config import Config
-from embedder import embed_query, embed_queries
-from indexer import _client
+import json_utils
+from embedder import embed_queries
+from indexer import _client, collection_available, search_params
+from query_cache import get_cache
 
 log = logging.getLogger(__name__)
 
 
+def _decode_links(raw) -> list:
+    """Decode a JSON-encoded link list ([] if missing or malformed)."""
+    if not raw:
+        return []
+    try:
+        return json_utils.loads(raw)
+    except json_utils.JSON_ERRORS:
+        return []
+
+
+def _lazy_links(name: str) -> property:
+    """Link list decoded from the raw payload string on first access."""
+    raw_attr, parsed_attr = f"_{name}_raw", f"_{name}"
+
+    def get(self) -> list:
+        value = getattr(self, parsed_attr)
+        if value is None:
+            value = _decode_links(getattr(self, raw_attr))
+            setattr(self, parsed_attr, value)
+        return value
+
+    return property(get, doc=f"Decoded {name} (parsed lazily).")
+
+
 # ---------------------------------------------------------------------------
 # Result model
 # ---------------------------------------------------------------------------
 
 class SearchResult:
     """A single retrieved chunk with its score."""
-    __slots__ = ("chunk_id", "text", "doc_url", "title", "section",
-                 "subsection", "subsubsection", "section_path", "connector",
-                 "sync_mode", "destination", "chunk_type", "tags", "score", "source",
-                 "doc_path", "doc_category", "internal_links", "external_links",
-                 "anchor_links", "is_redirect")
+    # Public fields, in to_dict() order
+    FIELDS = ("chunk_id", "text", "doc_url", "title", "section",
+              "subsection", "subsubsection", "section_path", "connector",
+              "sync_mode", "destination", "chunk_type", "tags", "score", "source",
+              "doc_path", "doc_category", "internal_links", "external_links",
+              "anchor_links", "is_redirect")
+    __slots__ = tuple(f for f in FIELDS if not f.endswith("_links")) + (
+        "_internal_links_raw", "_external_links_raw", "_anchor_links_raw",
+        "_internal_links", "_external_links", "_anchor_links",
+    )
+
+    # Reads every field in one C-level call (to_dict runs once per returned hit)
+    _field_values = operator.attrgetter(*FIELDS)
 
     def __init__(self, payload: dict, score: float, source: str):
         self.chunk_id      = payload.get("chunk_id", "")
@@ -57,30 +100,49 @@ class SearchResult:
         self.doc_path      = payload.get("doc_path", "")
         self.doc_category  = payload.get("doc_category", "")
         self.is_redirect   = payload.get("is_redirect", False)
-        # Parse link fields from JSON strings
-        import json
-        try:
-            self.internal_links = json.loads(payload.get("internal_links", "[]")) if payload.get("internal_links") else []
-        except (json.JSONDecodeError, TypeError):
-            self.internal_links = []
-        try:
-            self.external_links = json.loads(payload.get("external_links", "[]")) if payload.get("external_links") else []
-        except (json.JSONDecodeError, TypeError):
-            self.external_links = []
-        try:
-            self.anchor_links = json.loads(payload.get("anchor_links", "[]")) if payload.get("anchor_links") else []
-        except (json.JSONDecodeError, TypeError):
-            self.anchor_links = []
+        # Link fields stay JSON strings until read; hits dropped by
+        # thresholds, fusion or prefer-detail are never decoded
+        self._internal_links_raw = payload.get("internal_links")
+        self._external_links_raw = payload.get("external_links")
+        self._anchor_links_raw   = payload.get("anchor_links")
+        self._internal_links = self._external_links = self._anchor_links = None
+
+    internal_links = _lazy_links("internal_links")
+    external_links = _lazy_links("external_links")
+    anchor_links   = _lazy_links("anchor_links")
+
+    # Payload keys read above; searches fetch only these (skips raw_text etc.)
+    PAYLOAD_FIELDS = (
+        "chunk_id", "text", "doc_url", "section", "subsection", "subsubsection",
+        "section_path", "connector", "sync_mode", "destination", "chunk_type", "tags",
+        "doc_path", "doc_category", "is_redirect",
+        "internal_links", "external_links", "anchor_links",
+    )
 
     def to_dict(self) -> dict:
-        return {k: getattr(self, k) for k in self.__slots__}
+        return dict(zip(self.FIELDS, self._field_values(self)))
+
+
+_by_score = operator.attrgetter("score")
+
+_RESULT_PAYLOAD = PayloadSelectorInclude(include=list(SearchResult.PAYLOAD_FIELDS))
+# Candidate pools that are re-ranked and mostly discarded skip the link lists
+_LIGHT_PAYLOAD = PayloadSelectorInclude(
+    include=[f for f in SearchResult.PAYLOAD_FIELDS if not f.endswith("_links")]
+)
+
+# HNSW beam width + oversample/rescore over quantized vectors
+_SEARCH_PARAMS = search_params()
 
 
 # ---------------------------------------------------------------------------
 # Qdrant filter builder
 # ---------------------------------------------------------------------------
 
-def _build_filter(connector="", destination="", sync_mode="") -> Optional[Filter]:
+# Filters are memoized and shared between requests: treat them as read-only.
+
+@lru_cache(maxsize=256)
+def _build_filter(connector: str = "", destination: str = "", sync_mode: str = "") -> Optional[Filter]:
     must = []
     if connector:
         must.append(FieldCondition(key="connector", match=MatchValue(value=connector)))
@@ -91,6 +153,7 @@ def _build_filter(connector="", destination="", sync_mode="") -> Optional[Filter
     return Filter(must=must) if must else None
 
 
+@lru_cache(maxsize=1024)
 def _build_text_filter(keyword: str) -> Optional[Filter]:
     """Build a MatchText filter on the text field for full-text search."""
     if not keyword:
@@ -99,105 +162,181 @@ def _build_text_filter(keyword: str) -> Optional[Filter]:
 
 
 def _merge_filters(*filters: Optional[Filter]) -> Optional[Filter]:
-    """Merge multiple filters into one."""
+    """Merge multiple filters into one (returned unchanged if only one is set)."""
+    present = [f for f in filters if f and f.must]
+    if len(present) <= 1:
+        return present[0] if present else None
     all_must = []
-    for f in filters:
-        if f and f.must:
-            all_must.extend(f.must)
-    return Filter(must=all_must) if all_must else None
+    for f in present:
+        all_must.extend(f.must)
+    return Filter(must=all_must)
 
 
 # ---------------------------------------------------------------------------
 # Core search: dense with full-text pre-filter, fallback to pure dense
 # ---------------------------------------------------------------------------
 
+_STOPWORDS: frozenset = frozenset({
+    "the", "a", "an", "is", "are", "was", "were", "be", "been", "being",
+    "have", "has", "had", "do", "does", "did", "will", "would", "could",
+    "should", "may", "might", "must", "shall", "can", "need", "to", "of",
+    "in", "for", "on", "with", "at", "by", "from", "as", "into", "through",
+    "and", "or", "not", "if", "else", "than", "but", "so",
+})
+
+# Whitespace-delimited tokens of 3+ chars, scanned lazily (no full split list)
+_CANDIDATE_RE = re.compile(r"\S{3,}")
+
+
 def _extract_keyword(query: str) -> str:
     """Extract a keyword from the query for full-text filtering."""
     # Simple heuristic: use the first significant word
-    words = query.lower().split()
-    for word in words:
-        # Skip common stop words
-        if word not in {"the", "a", "an", "is", "are", "was", "were", "be", "been", "being",
-                        "have", "has", "had", "do", "does", "did", "will", "would", "could",
-                        "should", "may", "might", "must", "shall", "can", "need", "to", "of",
-                        "in", "for", "on", "with", "at", "by", "from", "as", "into", "through",
-                        "and", "or", "not", "if", "else", "than", "but", "so"}:
-            if len(word) >= 3:
-                return word
+    for m in _CANDIDATE_RE.finditer(query.lower()):
+        word = m.group()
+        if word not in _STOPWORDS:
+            return word
     return ""
 
 
+# Fan-out for independent per-collection searches (Qdrant I/O releases the GIL)
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retriever")
+
+
+def _embed_once() -> Callable[[List[str]], List[List[float]]]:
+    """embed_queries wrapper that runs the model once when shared across threads."""
+    lock = threading.Lock()
+    memo: Dict[tuple, List[List[float]]] = {}
+
+    def embed(queries: List[str]) -> List[List[float]]:
+        key = tuple(queries)
+        with lock:
+            if key not in memo:
+                memo[key] = embed_queries(queries)
+            return memo[key]
+
+    return embed
+
+
+def _rrf_merge(
+    result_lists: List[List[SearchResult]],
+    top_k: int,
+    rrf_k: int = Config.RRF_K,
+) -> List[SearchResult]:
+    """
+    Reciprocal-rank fusion of per-query result lists.
+
+    Each chunk scores sum(1 / (rrf_k + rank)) over the lists it appears in;
+    the returned SearchResult keeps its best cosine score so thresholds and
+    cross-collection merges keep working. With a single list this is the
+    identity (truncated to top_k).
+    """
+    if len(result_lists) == 1:
+        return result_lists[0][:top_k]
+
+    # Map chunk_ids to dense indices, then scatter-add 1/(rrf_k + rank) in one bincount
+    index: Dict[str, int] = {}
+    best: List[SearchResult] = []
+    ids: List[int] = []
+    ranks: List[int] = []
+    for results in result_lists:
+        for rank, r in enumerate(results, start=1):
+            i = index.get(r.chunk_id)
+            if i is None:
+                i = index[r.chunk_id] = len(best)
+                best.append(r)
+            elif r.score > best[i].score:
+                best[i] = r
+            ids.append(i)
+            ranks.append(rank)
+    if not best:
+        return []
+
+    contrib = 1.0 / (rrf_k + np.asarray(ranks, dtype=np.float64))
+    fused = np.bincount(np.asarray(ids, dtype=np.intp), weights=contrib, minlength=len(best))
+    order = np.argsort(-fused, kind="stable")[:top_k]
+    return [best[i] for i in order]
+
+
 def _dense_search_with_fallback(
-    query: str,
+    queries: List[str],
     collection: str,
     top_k: int,
     payload_filter: Optional[Filter] = None,
+    embed: Callable[[List[str]], List[List[float]]] = embed_queries,
+    light: bool = False,
 ) -> List[SearchResult]:
     """
     Dense search with full-text pre-filter, fallback to pure dense.
+    light=True fetches results without their link lists (see `hydrate`).
 
     Strategy:
-    1. Extract keyword from query
-    2. Run dense search with MatchText filter on text field
-    3. If zero results, fall back to pure dense search with no text filter
-    4. Return top-K from whichever path succeeds
+    1. Embed all queries in one forward pass
+    2. Run every query's dense search with a MatchText filter on its keyword
+       (pure dense when it has none) in one batched Qdrant request
+    3. Re-run the keyword queries that got no hits as pure dense search, in
+       a second batch
+    4. Fuse the per-query lists with RRF and return top-K
     """
-    client = _client()
-    if not client.collection_exists(collection):
+    queries = list(dict.fromkeys(queries)) or [""]
+    cache = get_cache()
+    cache_key = cache.make_key(f"{collection}#light" if light else collection, queries, top_k, payload_filter)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if not collection_available(collection):
         return []
+    client = _client()
 
     source = "code" if collection == Config.CODE_COLLECTION else "docs"
 
-    # Embed query
-    query_vec = embed_query(query)
-
-    # Extract keyword for full-text filter
-    keyword = _extract_keyword(query)
-    text_filter = _build_text_filter(keyword) if keyword else None
-
-    # Combine with payload filter
-    combined_filter = _merge_filters(payload_filter, text_filter)
-
-    # Try dense search with full-text pre-filter first
-    results = []
-    if combined_filter:
-        try:
-            hits = client.query_points(
-                collection_name=collection,
-                query=query_vec,
-                query_filter=combined_filter,
-                limit=top_k,
-                with_payload=True,
-                using="dense",
-            ).points
-
-            for hit in hits:
-                if hit.score >= Config.DOC_RELEVANCE_THRESHOLD:
-                    results.append(SearchResult(hit.payload, hit.score, source))
-
-        except Exception as e:
-            log.warning(f"Dense search with text filter failed: {e}")
-
-    # Fallback to pure dense search if no results
-    if not results:
+    # Embed all queries at once
+    query_vecs = embed(queries)
+
+    with_payload = _LIGHT_PAYLOAD if light else _RESULT_PAYLOAD
+
+    def _request(vec: List[float], f: Optional[Filter]) -> QueryRequest:
+        # Qdrant drops hits below the relevance threshold before returning payloads
+        return QueryRequest(query=vec, filter=f, limit=top_k, with_payload=with_payload, using="dense",
+                            score_threshold=Config.DOC_RELEVANCE_THRESHOLD, params=_SEARCH_PARAMS)
+
+    # First batch: each query's keyword-filtered search, or its pure dense
+    # search when it has no keyword. Pure dense fallbacks for keyword queries
+    # whose filter matched nothing go out in one second batch, so Qdrant only
+    # runs the extra ANN search on misses.
+    has_filter = []
+    requests: List[QueryRequest] = []
+    for q, vec in zip(queries, query_vecs):
+        keyword = _extract_keyword(q)
+        has_filter.append(bool(keyword))
+        text_filter = _merge_filters(payload_filter, _build_text_filter(keyword)) if keyword else payload_filter
+        requests.append(_request(vec, text_filter))
+
+    try:
+        points = [resp.points for resp in client.query_batch_points(collection_name=collection, requests=requests)]
+    except Exception as e:
+        log.warning(f"Dense search with text filter failed: {e}")
+        # Retry everything as pure dense search
+        points = [[] for _ in queries]
+        has_filter = [True] * len(queries)
+
+    # Only metadata filters, no text filter
+    misses = [i for i, hits in enumerate(points) if not hits and has_filter[i]]
+    if misses:
         try:
-            hits = client.query_points(
-                collection_name=collection,
-                query=query_vec,
-                query_filter=payload_filter,  # Only metadata filters, no text filter
-                limit=top_k,
-                with_payload=True,
-                using="dense",
-            ).points
-
-            results = []
-            for hit in hits:
-                if hit.score >= Config.DOC_RELEVANCE_THRESHOLD:
-                    results.append(SearchResult(hit.payload, hit.score, source))
-
+            pure = client.query_batch_points(collection_name=collection,
+                                             requests=[_request(query_vecs[i], payload_filter) for i in misses])
         except Exception as e:
             log.warning(f"Pure dense search failed: {e}")
+            pure = []
+        for i, resp in zip(misses, pure):
+            points[i] = resp.points
+
+    per_query = [[SearchResult(hit.payload, hit.score, source) for hit in hits] for hits in points]
 
+    results = _rrf_merge(per_query, top_k)
+    if results:
+        cache.put(cache_key, results)
     return results
 
 
@@ -209,22 +348,37 @@ def _prefer_detail_over_summary(
     Apply retrieval rule: when both summary (§12) and detail chunks score above
     threshold, prefer detail chunks. Summary chunks are only returned as fallback.
     """
-    if not results:
-        return results
+    # Single pass: collect detail chunks and note whether any clears the threshold
+    filtered = []
+    has_high_scoring_detail = False
+    for r in results:
+        if r.chunk_type != "summary":
+            filtered.append(r)
+            if r.score >= threshold:
+                has_high_scoring_detail = True
 
-    # Check if any detail chunk scores above threshold
-    has_high_scoring_detail = any(
-        r.chunk_type != "summary" and r.score >= threshold
-        for r in results
-    )
+    # Filter out summary chunks only when a detail chunk qualifies
+    return filtered if has_high_scoring_detail else results
 
-    if has_high_scoring_detail:
-        # Filter out summary chunks
-        filtered = [r for r in results if r.chunk_type != "summary"]
-        if filtered:
-            return filtered
 
-    return results
+# ---------------------------------------------------------------------------
+# Startup warmup
+# ---------------------------------------------------------------------------
+
+def warmup() -> None:
+    """
+    Pay first-request costs at startup instead of on a user's query.
+
+    Runs one query forward pass (allocator and kernel warmup beyond the
+    model load) and opens the Qdrant connection, caching collection
+    existence for both collections.
+    """
+    embed_queries(["warmup"])
+    for collection in (Config.DOCS_COLLECTION, Config.CODE_COLLECTION):
+        try:
+            collection_available(collection)
+        except Exception as e:
+            log.warning(f"Qdrant warmup for '{collection}' failed: {e}")
 
 
 # ---------------------------------------------------------------------------
@@ -239,28 +393,89 @@ def search_docs(
     sync_mode: str = "",
 ) -> List[dict]:
     """Search docs using dense embeddings with full-text pre-filter."""
+    return _search_docs(queries, top_k, connector, destination, sync_mode)
+
+
+def search_docs_light(
+    queries: List[str],
+    top_k: int = Config.MAX_RETRIEVED_DOCS,
+    connector: str = "",
+    destination: str = "",
+    sync_mode: str = "",
+) -> List[dict]:
+    """
+    Like search_docs, but without internal/external/anchor links (they come
+    back as empty lists). For candidate pools that are re-ranked before only
+    a few survive; pass the survivors to `hydrate` for their links.
+    """
+    return _search_docs(queries, top_k, connector, destination, sync_mode, light=True)
+
+
+def _search_docs(
+    queries: List[str],
+    top_k: int,
+    connector: str,
+    destination: str,
+    sync_mode: str,
+    light: bool = False,
+) -> List[dict]:
     filt = _build_filter(connector=connector, destination=destination, sync_mode=sync_mode)
 
-    # Use the first query for search (primary query)
-    primary_query = queries[0] if queries else ""
     results = _dense_search_with_fallback(
-        primary_query, Config.DOCS_COLLECTION, top_k=top_k, payload_filter=filt
+        queries, Config.DOCS_COLLECTION, top_k=top_k, payload_filter=filt, light=light
     )
 
     # Apply "prefer detail over summary" rule
     results = _prefer_detail_over_summary(results)
 
     log.info(
-        f"search_docs(dense+fulltext): {len(results)} results "
-        f"[conn={connector!r}, dest={destination!r}] query={primary_query!r}"
+        f"search_docs(dense+fulltext{', light' if light else ''}): {len(results)} results "
+        f"[conn={connector!r}, dest={destination!r}] queries={queries!r}"
     )
     return [r.to_dict() for r in results]
 
 
+def hydrate(results: List[dict], collection: str = Config.DOCS_COLLECTION) -> List[dict]:
+    """
+    Fill in the full payload (link lists included) for results from
+    `search_docs_light`, in one filtered scroll on the indexed chunk_id
+    field (independent of the point ID scheme). Scores and any keys added by
+    the caller (e.g. "reranked") are kept. On failure results are returned
+    as they are.
+    """
+    if not results:
+        return results
+    chunk_ids = list(dict.fromkeys(r["chunk_id"] for r in results))
+    try:
+        points, _ = _client().scroll(
+            collection_name=collection,
+            scroll_filter=Filter(must=[FieldCondition(key="chunk_id", match=MatchAny(any=chunk_ids))]),
+            limit=len(chunk_ids),
+            with_payload=_RESULT_PAYLOAD,
+            with_vectors=False,
+        )
+    except Exception as e:
+        log.warning(f"Failed to hydrate {len(results)} results: {e}")
+        return results
+
+    payloads = {p.payload.get("chunk_id"): p.payload for p in points}
+    if len(payloads) < len(chunk_ids):
+        log.warning(f"Hydrated {len(payloads)}/{len(chunk_ids)} results from '{collection}'; the rest keep light payloads")
+    hydrated = []
+    for r in results:
+        payload = payloads.get(r["chunk_id"])
+        if payload is None:
+            hydrated.append(r)
+            continue
+        full = dict(r)
+        full.update(SearchResult(payload, r["score"], r["source"]).to_dict())
+        hydrated.append(full)
+    return hydrated
+
+
 def search_code(queries: List[str], top_k: int = 3) -> List[dict]:
     """Search code using dense embeddings with full-text pre-filter."""
-    primary_query = queries[0] if queries else ""
-    results = _dense_search_with_fallback(primary_query, Config.CODE_COLLECTION, top_k=top_k)
+    results = _dense_search_with_fallback(queries, Config.CODE_COLLECTION, top_k=top_k)
     return [r.to_dict() for r in results]
 
 
@@ -273,14 +488,16 @@ def hybrid_search(
     filt = _build_filter(**{k: v for k, v in filters.items()
                             if k in ("connector", "destination", "sync_mode")})
 
-    primary_query = queries[0] if queries else ""
-    docs = _dense_search_with_fallback(primary_query, Config.DOCS_COLLECTION, top_k=top_k, payload_filter=filt)
-    code = _dense_search_with_fallback(primary_query, Config.CODE_COLLECTION, top_k=3)
+    # Both collections are searched concurrently; the queries are embedded once
+    embed = _embed_once()
+    docs_future = _SEARCH_POOL.submit(
+        _dense_search_with_fallback, queries, Config.DOCS_COLLECTION, top_k, filt, embed
+    )
+    code = _dense_search_with_fallback(queries, Config.CODE_COLLECTION, top_k=3, embed=embed)
+    docs = docs_future.result()
 
     # Merge results by score
-    merged = docs + code
-    merged.sort(key=lambda r: r.score, reverse=True)
-    merged = merged[:top_k]
+    merged = heapq.nlargest(top_k, docs + code, key=_by_score)
 
     # Apply "prefer detail over summary" rule
     merged = _prefer_detail_over_summary(merged)
@@ -313,38 +530,49 @@ def search_by_doc_paths(
     if collection is None:
         collection = Config.DOCS_COLLECTION
 
-    client = _client()
-    if not client.collection_exists(collection):
+    doc_paths = doc_paths[:10]  # Limit to prevent abuse
+    cache = get_cache()
+    cache_key = cache.make_key(f"{collection}#doc_paths", doc_paths, top_k_per_path)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if not collection_available(collection):
         return []
+    client = _client()
 
     all_results: List[SearchResult] = []
+    seen_chunk_ids: set[str] = set()
     source = "code" if collection == Config.CODE_COLLECTION else "docs"
+    failed = False
 
-    for doc_path in doc_paths[:10]:  # Limit to prevent abuse
-        if not doc_path:
-            continue
-
+    doc_paths = list(dict.fromkeys(p for p in doc_paths if p))
+    if doc_paths:
+        # One filter-only query for all paths; Qdrant buckets hits per doc_path
         try:
-            filt = Filter(must=[FieldCondition(key="doc_path", match=MatchValue(value=doc_path))])
-
-            # Dense search with empty query to get all matching chunks
-            hits = client.query_points(
+            resp = client.query_points_groups(
                 collection_name=collection,
-                query_filter=filt,
-                limit=top_k_per_path,
-                with_payload=True,
+                query_filter=Filter(must=[FieldCondition(key="doc_path", match=MatchAny(any=doc_paths))]),
+                group_by="doc_path",
+                group_size=top_k_per_path,
+                limit=len(doc_paths),
+                with_payload=_RESULT_PAYLOAD,
                 using="dense",
-            ).points
-
-            for hit in hits:
-                result = SearchResult(hit.payload, hit.score, source)
-                # Avoid duplicates
-                if not any(r.chunk_id == result.chunk_id for r in all_results):
-                    all_results.append(result)
-
+            )
+            groups = {g.id: g.hits for g in resp.groups}
+            for doc_path in doc_paths:  # keep the caller's path order
+                for hit in groups.get(doc_path, ()):
+                    result = SearchResult(hit.payload, hit.score, source)
+                    # Avoid duplicates
+                    if result.chunk_id not in seen_chunk_ids:
+                        seen_chunk_ids.add(result.chunk_id)
+                        all_results.append(result)
         except Exception as e:
-            log.warning(f"Failed to fetch doc_path {doc_path}: {e}")
+            log.warning(f"Failed to fetch doc_paths {doc_paths}: {e}")
+            failed = True
 
+    if not failed:
+        cache.put(cache_key, all_results)
     return all_results
 
 
@@ -404,6 +632,10 @@ def expand_with_linked_docs(
         top_k_per_path=3
     )
 
+    # Drop linked chunks that are already among the original results
+    original_ids = {r.chunk_id for r in results}
+    linked_results = [lr for lr in linked_results if lr.chunk_id not in original_ids]
+
     if not linked_results:
         return results
 
@@ -418,9 +650,7 @@ def expand_with_linked_docs(
             lr.score *= 1.1
 
     # Merge by score
-    merged = results + linked_results
-    merged.sort(key=lambda r: r.score, reverse=True)
-    merged = merged[:top_k * 2]
+    merged = heapq.nlargest(top_k * 2, results + linked_results, key=_by_score)
 
     # Apply "prefer detail over summary" rule
     merged = _prefer_detail_over_summary(merged)
@@ -455,9 +685,8 @@ def search_docs_with_expansion(
     """
     filt = _build_filter(connector=connector, destination=destination, sync_mode=sync_mode)
 
-    primary_query = queries[0] if queries else ""
     results = _dense_search_with_fallback(
-        primary_query, Config.DOCS_COLLECTION, top_k=top_k, payload_filter=filt
+        queries, Config.DOCS_COLLECTION, top_k=top_k, payload_filter=filt
     )
 
     # Apply "prefer detail over summary" rule
@@ -469,7 +698,7 @@ def search_docs_with_expansion(
     log.info(
         f"search_docs_with_expansion: {len(results)} results "
         f"[conn={connector!r}, dest={destination!r}, expand={expand_links}] "
-        f"query={primary_query!r}"
+        f"queries={queries!r}"
     )
 
     return [r.to_dict() for r in results]
@@ -16,22 +16,28 @@ MCP Tools (also callable as REST via /api/* for internal service use):
 """
 
 from __future__ import annotations
+import asyncio
+import hashlib
+import json
 import logging
 import threading
-from contextlib import asynccontextmanager
+import time
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
-from typing import Annotated, List, Optional
+from typing import Annotated, List, Optional, Tuple
 
 import uvicorn
-from fastapi import FastAPI, BackgroundTasks, Query
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, BackgroundTasks, Query, Request
+from fastapi.responses import JSONResponse, Response
 from fastmcp import FastMCP
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict
 
 from config import Config
 from embedder import embed_documents, is_ready
-from chunker import parse_file
+from chunker import iter_chunks
+from ingest_utils import batch_generator, process_with_concurrency
 from indexer import (
+    enable_indexing,
     ensure_collection,
     list_collections as _list_collections,
     collection_stats as _collection_stats,
@@ -144,43 +150,115 @@ def collection_stats(collection: str = Config.DOCS_COLLECTION) -> dict:
     return _collection_stats(collection)
 
 
+# ---------------------------------------------------------------------------
+# Collection info cache (REST dashboards poll these; they change on ingest)
+# ---------------------------------------------------------------------------
+
+_COLLECTION_INFO_TTL = 30.0   # seconds; covers ingests run by other processes
+_collection_info: dict = {}   # key → (expires, value, etag)
+_collection_info_lock = threading.Lock()
+
+
+def _invalidate_collection_info() -> None:
+    with _collection_info_lock:
+        _collection_info.clear()
+
+
+def _cached_collection_info(key: tuple) -> Optional[tuple]:
+    """Return a fresh (value, etag) for key, or None."""
+    with _collection_info_lock:
+        entry = _collection_info.get(key)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1], entry[2]
+
+
+def _load_collection_info(key: tuple, fn, *args) -> tuple:
+    """Call fn(*args), cache the result under key and return (value, etag)."""
+    value = fn(*args)
+    digest = hashlib.blake2b(json.dumps(value, sort_keys=True, default=str).encode("utf-8"), digest_size=8)
+    etag = f'W/"{digest.hexdigest()}"'
+    with _collection_info_lock:
+        _collection_info[key] = (time.monotonic() + _COLLECTION_INFO_TTL, value, etag)
+    return value, etag
+
+
+def _etag_response(request: Request, value, etag: str) -> Response:
+    """304 when the client already holds this representation, else the JSON body."""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(content=value, headers={"ETag": etag})
+
+
 # ---------------------------------------------------------------------------
 # Ingest implementation (shared by tool + REST endpoint)
 # ---------------------------------------------------------------------------
 
+# One embedding forward at a time across all ingest workers: the server
+# model runs on CPU, where parallel forwards only contend for cores. The
+# slot covers the model forward only, so the other workers' cache lookups
+# and Qdrant upserts overlap with it; beyond a few workers there's nothing
+# left to overlap, hence the small INGEST_CONCURRENCY default.
+_EMBED_SLOTS = threading.BoundedSemaphore(1)
+
+
+def _embed_and_upsert(job: tuple, wait: bool = False) -> tuple:
+    """
+    Embed and upsert one (collection, chunks) micro-batch.
+
+    Workers don't wait for Qdrant to apply their batch; `_run_ingest` sends
+    each collection's final batch with wait=True once the pool has drained.
+    """
+    collection, batch = job
+    texts = [c.text for c in batch]  # Use full text with breadcrumb
+    vecs = embed_documents(texts, forward_lock=_EMBED_SLOTS)
+    return collection, upsert_chunks(collection, batch, vecs, wait=wait)
+
+
 def _run_ingest(path: str, reset: bool) -> dict:
     docs_path = Path(path)
     if not docs_path.exists():
         return {"error": f"File not found: {path}"}
 
-    chunks = parse_file(docs_path)
-    prose_chunks = [c for c in chunks if c.chunk_type != "code"]
-    code_chunks  = [c for c in chunks if c.chunk_type == "code"]
+    prose_chunks, code_chunks = [], []
+    for c in iter_chunks(docs_path):
+        (code_chunks if c.chunk_type == "code" else prose_chunks).append(c)
 
     ensure_collection(Config.DOCS_COLLECTION, drop_first=reset)
     ensure_collection(Config.CODE_COLLECTION, drop_first=reset)
+    _invalidate_collection_info()
 
-    prose_count = code_count = 0
-
-    if prose_chunks:
-        log.info(f"Embedding {len(prose_chunks)} doc chunks...")
-        texts = [c.text for c in prose_chunks]  # Use full text with breadcrumb
-        prose_vecs = embed_documents(texts)
-        prose_count = upsert_chunks(Config.DOCS_COLLECTION, prose_chunks, prose_vecs)
-        log.info(f"Upserted {prose_count} doc chunks (dense-only)")
-
-    if code_chunks:
-        log.info(f"Embedding {len(code_chunks)} code chunks...")
-        texts = [c.text for c in code_chunks]  # Use full text with breadcrumb
-        code_vecs = embed_documents(texts)
-        code_count = upsert_chunks(Config.CODE_COLLECTION, code_chunks, code_vecs)
-        log.info(f"Upserted {code_count} code chunks (dense-only)")
+    log.info(
+        f"Embedding {len(prose_chunks)} doc + {len(code_chunks)} code chunks "
+        f"({Config.INGEST_CONCURRENCY} workers)..."
+    )
+    jobs, final_jobs = [], []
+    for collection, chunks in ((Config.DOCS_COLLECTION, prose_chunks), (Config.CODE_COLLECTION, code_chunks)):
+        batches = [(collection, b) for b in batch_generator(chunks, Config.EMBED_BATCH_SIZE)]
+        jobs += batches[:-1]
+        final_jobs += batches[-1:]
+    upserted = {Config.DOCS_COLLECTION: 0, Config.CODE_COLLECTION: 0}
+    for collection, count in process_with_concurrency(jobs, _embed_and_upsert, Config.INGEST_CONCURRENCY):
+        upserted[collection] += count
+    # Barrier: Qdrant applies updates in order, so these return once every batch is visible
+    for job in final_jobs:
+        collection, count = _embed_and_upsert(job, wait=True)
+        upserted[collection] += count
+    prose_count = upserted[Config.DOCS_COLLECTION]
+    code_count = upserted[Config.CODE_COLLECTION]
+    log.info(f"Upserted {prose_count} doc chunks, {code_count} code chunks (dense-only)")
+
+    # Don't hold /api/ingest/sync or the MCP tool until the HNSW build is GREEN;
+    # searches work meanwhile and pick up the index as segments finish
+    enable_indexing(Config.DOCS_COLLECTION, wait=False)
+    enable_indexing(Config.CODE_COLLECTION, wait=False)
+    _invalidate_collection_info()
 
     return {
         "ok": True,
         "docs_upserted": prose_count,
         "code_upserted": code_count,
-        "total_chunks": len(chunks),
+        "total_chunks": len(prose_chunks) + len(code_chunks),
         "reset": reset,
         "path": str(path),
     }
@@ -190,6 +268,25 @@ def _run_ingest(path: str, reset: bool) -> dict:
 # FastAPI app
 # ---------------------------------------------------------------------------
 
+def _warm() -> None:
+    """Warm the retrieval path and the cross-encoder (runs in a worker thread)."""
+    ret.warmup()
+    log.info("Retriever warmed (query forward pass + Qdrant connection) ✓")
+    # Load the cross-encoder now rather than on the first reranked request
+    from reranker import warm as warm_reranker
+    try:
+        warm_reranker()
+        log.info("Cross-encoder warmed ✓")
+    except Exception as e:
+        log.warning(f"Cross-encoder warmup failed: {e} — reranked search will return bi-encoder order")
+
+
+def _log_warm_failure(task: asyncio.Task) -> None:
+    """Retrieve and log a failed warmup (keeps /health not-ready)."""
+    if not task.cancelled() and task.exception() is not None:
+        log.error(f"Retriever warmup failed: {task.exception()}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     log.info("RAG Service starting up...")
@@ -200,7 +297,15 @@ async def lifespan(app: FastAPI):
     from embedder import _get_model
     _get_model()
     log.info("Embedding model warmed ✓")
+    # Retriever + cross-encoder warmup runs off the event loop: the server
+    # starts taking requests while it finishes, and /health reports not-ready
+    # until the task is done.
+    app.state.warm_task = asyncio.create_task(asyncio.to_thread(_warm))
+    app.state.warm_task.add_done_callback(_log_warm_failure)
     yield
+    app.state.warm_task.cancel()
+    with suppress(asyncio.CancelledError, Exception):
+        await app.state.warm_task
     log.info("RAG Service shutting down.")
 
 
@@ -217,17 +322,38 @@ app.mount("/mcp", mcp.http_app())
 
 @app.get("/health")
 def health():
-    """Readiness probe. Returns ready=true once the embedding model is loaded."""
-    return {"status": "ok", "ready": is_ready()}
+    """Readiness probe. ready=true once the embedder is loaded and warmup has finished."""
+    from reranker import is_ready as reranker_ready
+    embedder = is_ready()
+    reranker = reranker_ready()
+    # A failed reranker load falls back to bi-encoder order (_warm logs it and
+    # carries on), but a failed retriever warmup keeps the service not-ready
+    warm_task = getattr(app.state, "warm_task", None)
+    warmed = (
+        warm_task is not None and warm_task.done()
+        and not warm_task.cancelled() and warm_task.exception() is None
+    )
+    return {
+        "status": "ok",
+        "ready": embedder and warmed,
+        "models": {"embedder": embedder, "reranker": reranker},
+    }
 
 
 # ---------------------------------------------------------------------------
 # Convenience REST wrappers (used by agent service via httpx)
 # ---------------------------------------------------------------------------
 
+# Request bodies are read-only once validated; tuple defaults are shared
+# instead of building a fresh list per request via default_factory.
+_REQUEST_CONFIG = ConfigDict(frozen=True, extra="ignore")
+
+
 class SearchDocsRequest(BaseModel):
+    model_config = _REQUEST_CONFIG
+
     query: str
-    queries: List[str] = Field(default_factory=list)
+    queries: Tuple[str, ...] = ()
     top_k: int = 5
     connector: str = ""
     destination: str = ""
@@ -235,20 +361,25 @@ class SearchDocsRequest(BaseModel):
 
 
 class SearchCodeRequest(BaseModel):
+    model_config = _REQUEST_CONFIG
+
     query: str
-    queries: List[str] = Field(default_factory=list)
+    queries: Tuple[str, ...] = ()
     top_k: int = 3
 
 
 class IngestRequest(BaseModel):
+    model_config = _REQUEST_CONFIG
+
     path: str = str(Config.DOCS_FILE)
     reset: bool = False
 
 
 @app.post("/api/search_docs")
-def api_search_docs(body: SearchDocsRequest):
-    all_queries = [body.query] + body.queries
-    return ret.search_docs(
+async def api_search_docs(body: SearchDocsRequest):
+    all_queries = [body.query, *body.queries]
+    return await asyncio.to_thread(
+        ret.search_docs,
         queries=all_queries,
         top_k=body.top_k,
         connector=body.connector,
@@ -258,31 +389,51 @@ def api_search_docs(body: SearchDocsRequest):
 
 
 @app.post("/api/search_code")
-def api_search_code(body: SearchCodeRequest):
-    all_queries = [body.query] + body.queries
-    return ret.search_code(queries=all_queries, top_k=body.top_k)
+async def api_search_code(body: SearchCodeRequest):
+    all_queries = [body.query, *body.queries]
+    return await asyncio.to_thread(ret.search_code, queries=all_queries, top_k=body.top_k)
+
+
+def _ensure_reranker() -> bool:
+    """Load the cross-encoder if needed; False (logged) when it can't be loaded."""
+    from reranker import warm as warm_reranker
+    try:
+        warm_reranker()
+        return True
+    except Exception as e:
+        log.warning(f"Cross-encoder unavailable: {e} — returning bi-encoder order")
+        return False
 
 
 @app.post("/api/search_docs_reranked")
-def api_search_docs_reranked(body: SearchDocsRequest):
+async def api_search_docs_reranked(body: SearchDocsRequest):
     """
     Bi-encoder retrieval + cross-encoder re-ranking.
     Retrieves top-20 candidates, re-ranks with ms-marco cross-encoder, returns top-k.
     More accurate than /api/search_docs but slightly slower (~30ms extra on CPU).
     """
     from reranker import rerank
-    all_queries = [body.query] + body.queries
-    # Retrieve wider candidate set for re-ranking
-    candidates = ret.search_docs(
-        queries=all_queries,
-        top_k=max(body.top_k * 3, 15),   # retrieve 3x more for re-ranking pool
-        connector=body.connector,
-        destination=body.destination,
-        sync_mode=body.sync_mode,
+    all_queries = [body.query, *body.queries]
+    # Retrieve wider candidate set for re-ranking while the cross-encoder is
+    # made ready (a no-op once loaded) — the two stages share no state
+    candidates, reranker_ok = await asyncio.gather(
+        asyncio.to_thread(
+            ret.search_docs_light,   # links are fetched for the final top_k only
+            queries=all_queries,
+            top_k=max(body.top_k * 3, 15),   # retrieve 3x more for re-ranking pool
+            connector=body.connector,
+            destination=body.destination,
+            sync_mode=body.sync_mode,
+        ),
+        asyncio.to_thread(_ensure_reranker),
     )
-    # Re-rank using primary query (cross-encoder is pairwise — single query)
-    reranked = rerank(query=body.query, results=candidates, top_k=body.top_k)
-    return reranked
+    if not reranker_ok:
+        # Same fallback as rerank(), without a second load attempt
+        return await asyncio.to_thread(ret.hydrate, candidates[:body.top_k])
+    # Re-rank using primary query (cross-encoder is pairwise — single query);
+    # CPU-bound, so it runs in a worker thread rather than on the event loop
+    reranked = await asyncio.to_thread(rerank, query=body.query, results=candidates, top_k=body.top_k)
+    return await asyncio.to_thread(ret.hydrate, reranked)
 
 
 @app.post("/api/ingest")
@@ -299,21 +450,37 @@ def api_ingest_sync(body: IngestRequest):
 
 
 @app.get("/api/chunk/{chunk_id}")
-def api_get_chunk(chunk_id: str, collection: str = Config.DOCS_COLLECTION):
-    result = _get_chunk(collection, chunk_id)
+async def api_get_chunk(chunk_id: str, collection: str = Config.DOCS_COLLECTION):
+    result = await asyncio.to_thread(_get_chunk, collection, chunk_id)
     if result is None:
         return JSONResponse(status_code=404, content={"error": "not found"})
     return result
 
 
+@app.get("/api/cache_stats")
+def api_cache_stats():
+    """Hit/miss counters for the query-embedding and retrieval-result caches."""
+    from embedder import query_cache_stats
+    from query_cache import get_cache
+    return {"query_embeddings": query_cache_stats(), "search_results": get_cache().stats()}
+
+
 @app.get("/api/collections")
-def api_list_collections():
-    return _list_collections()
+async def api_list_collections(request: Request):
+    key = ("collections",)
+    cached = _cached_collection_info(key)
+    if cached is None:
+        cached = await asyncio.to_thread(_load_collection_info, key, _list_collections)
+    return _etag_response(request, *cached)
 
 
 @app.get("/api/collections/{name}/stats")
-def api_collection_stats(name: str):
-    return _collection_stats(name)
+async def api_collection_stats(name: str, request: Request):
+    key = ("stats", name)
+    cached = _cached_collection_info(key)
+    if cached is None:
+        cached = await asyncio.to_thread(_load_collection_info, key, _collection_stats, name)
+    return _etag_response(request, *cached)
 
 
 # ---------------------------------------------------------------------------
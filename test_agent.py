@@ -10,29 +10,40 @@ Usage:
     python test_agent.py --message "How do I set up CDC with Postgres?"
     python test_agent.py --user U99TESTUSER --channel C99TESTCHAN
     python test_agent.py --scenario cdc           # run a preset scenario
+    python test_agent.py --scenario all -p 4      # every scenario, 4 at a time
 
 Each run = one Slack thread. Messages in the same run share thread_ts.
 """
 
+import importlib
+import io
+import re
 import sys
 import time
 import uuid
 import argparse
 import textwrap
+import threading
 from datetime import datetime
+from operator import attrgetter
 from typing import Optional, List, Dict, Any
+from unicodedata import east_asian_width
 
 # ── pretty output helpers ──────────────────────────────────────────────────
-RESET  = "\033[0m"
-BOLD   = "\033[1m"
-CYAN   = "\033[96m"
-GREEN  = "\033[92m"
-YELLOW = "\033[93m"
-RED    = "\033[91m"
-DIM    = "\033[2m"
-BLUE   = "\033[94m"
-MAGENTA = "\033[95m"
-WHITE  = "\033[97m"
+# Boxes and colors only on a terminal; redirected output (CI logs, files)
+# gets plain one-line records from the printers below instead.
+_TTY = sys.stdout.isatty()
+
+RESET  = "\033[0m" if _TTY else ""
+BOLD   = "\033[1m" if _TTY else ""
+CYAN   = "\033[96m" if _TTY else ""
+GREEN  = "\033[92m" if _TTY else ""
+YELLOW = "\033[93m" if _TTY else ""
+RED    = "\033[91m" if _TTY else ""
+DIM    = "\033[2m" if _TTY else ""
+BLUE   = "\033[94m" if _TTY else ""
+MAGENTA = "\033[95m" if _TTY else ""
+WHITE  = "\033[97m" if _TTY else ""
 
 # Box drawing characters
 BOX_H = "─"
@@ -43,34 +54,104 @@ BOX_BL = "╰"
 BOX_BR = "╯"
 BOX_CROSS = "┼"
 
+# Box borders, built once (every printer below draws the same 60-column box)
+_INNER_WIDTH = 58
+_H58 = BOX_H * _INNER_WIDTH
+_H60 = BOX_H * 60
+_TOP = f"{BOX_TL}{_H58}{BOX_TR}"
+_MID = f"{BOX_V}{_H58}{BOX_V}"
+_BOT = f"{BOX_BL}{_H58}{BOX_BR}"
+
+
+# Reused wrappers: textwrap.fill builds a new TextWrapper per call, and
+# wrap() returns the lines directly instead of joining then re-splitting
+_WRAP_54 = textwrap.TextWrapper(width=54)
+_WRAP_52 = textwrap.TextWrapper(width=52)
+_WRAP_48 = textwrap.TextWrapper(width=48)
+
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def _strip_ansi(text: str) -> str:
+    """Remove ANSI color codes."""
+    return _ANSI_RE.sub("", text)
+
+
+_COLOR_NAMES = ("RESET", "BOLD", "CYAN", "GREEN", "YELLOW", "RED", "DIM", "BLUE", "MAGENTA", "WHITE")
+
+
+def _disable_color() -> None:
+    """Blank every color constant (--no-color), so printers do no ANSI work at all."""
+    globals().update(dict.fromkeys(_COLOR_NAMES, ""))
+
+
+def _display_width(text: str) -> int:
+    """Terminal columns taken by text: ANSI codes take none, wide emoji take two."""
+    plain = _strip_ansi(text)
+    return len(plain) + sum(1 for ch in plain if ord(ch) > 0x2000 and east_asian_width(ch) in "WF")
+
+
+def _row(text: str) -> str:
+    """
+    One box row. Pads by visible width rather than len(): str.ljust counts
+    ANSI escape bytes, which left colored rows short of the right border.
+    """
+    return f"{BOX_V}{text}{' ' * max(0, _INNER_WIDTH - _display_width(text))}{BOX_V}"
+
+
+def _emit(lines: List[str]) -> None:
+    """Write a whole box in one call instead of one print() per line."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
 def header(text):
-    print(f"\n{BOLD}{CYAN}{BOX_H*60}{RESET}")
+    if not _TTY:
+        print(f"\n== {text} ==")
+        return
+    print(f"\n{BOLD}{CYAN}{_H60}{RESET}")
     print(f"{BOLD}{CYAN}  {text}{RESET}")
-    print(f"{BOLD}{CYAN}{BOX_H*60}{RESET}")
+    print(f"{BOLD}{CYAN}{_H60}{RESET}")
 
 def footer():
-    print(f"\n{DIM}{BOX_H*60}{RESET}")
+    if not _TTY:
+        return
+    print(f"\n{DIM}{_H60}{RESET}")
 
 def user_msg(text):
-    print(f"\n{BOX_TL}{BOX_H*58}{BOX_TR}")
-    print(f"{BOX_V} {BOLD}{BLUE}👤 USER{RESET}{DIM} (iteration){RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}  {text}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_BL}{BOX_H*58}{BOX_BR}")
+    if not _TTY:
+        print(f"\n[USER] {text}")
+        return
+    buf = []
+    buf.append(f"\n{_TOP}")
+    buf.append(_row(f" {BOLD}{BLUE}👤 USER{RESET}{DIM} (iteration){RESET}"))
+    buf.append(_row(f"  {text}"))
+    buf.append(_BOT)
+    _emit(buf)
 
 def bot_msg(text):
-    wrapped = textwrap.fill(text, 54)
-    lines = wrapped.split('\n')
-    print(f"\n{BOX_TL}{BOX_H*58}{BOX_TR}")
-    print(f"{BOX_V} {BOLD}{GREEN}🤖 BOT RESPONSE{RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}{BOX_H*56}{BOX_V}")
+    if not _TTY:
+        print(f"\n[BOT] {text}")
+        return
+    buf = []
+    lines = _WRAP_54.wrap(text) or [""]
+    buf.append(f"\n{_TOP}")
+    buf.append(_row(f" {BOLD}{GREEN}🤖 BOT RESPONSE{RESET}"))
+    buf.append(_MID)
     for line in lines:
-        print(f"{BOX_V}  {line}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_BL}{BOX_H*58}{BOX_BR}")
+        buf.append(_row(f"  {line}"))
+    buf.append(_BOT)
+    _emit(buf)
 
 def separator():
-    print(f"\n{DIM}{BOX_H*60}{RESET}")
+    if not _TTY:
+        return
+    print(f"\n{DIM}{_H60}{RESET}")
 
 def section_header(title):
+    if not _TTY:
+        print(f"\n== {title} ==")
+        return
     print(f"\n{BOLD}{CYAN}╔{'═'*58}╗{RESET}")
     print(f"{BOLD}{CYAN}║  {title.center(54)}  ║{RESET}")
     print(f"{BOLD}{CYAN}╚{'═'*58}╝{RESET}")
@@ -89,64 +170,85 @@ def success(text):
 
 
 # ── pretty docs printer ────────────────────────────────────────────────────
+# RetrievedDocument fields shown per doc, read in one call
+_DOC_FIELDS = attrgetter('title', 'relevance_score', 'source_type', 'content')
+
 def print_docs_retrieved(docs: List[Any], iteration: int = None):
     """Pretty print retrieved documentation."""
+    if not _TTY:
+        print(f"[DOCS] {len(docs)} retrieved")
+        for i, doc in enumerate(docs[:5], 1):
+            print(f"  [{i}] {getattr(doc, 'relevance_score', 0):.2%} {getattr(doc, 'title', 'Unknown')}")
+        return
+    buf = []
     if not docs:
-        print(f"\n{BOX_TL}{BOX_H*58}{BOX_TR}")
-        print(f"{BOX_V} {BOLD}{MAGENTA}📄 DOCS RETRIEVED{RESET}".ljust(58) + f"{BOX_V}")
-        print(f"{BOX_V}{BOX_H*56}{BOX_V}")
-        print(f"{BOX_V}  {DIM}No docs retrieved (below threshold or fallback){RESET}".ljust(58) + f"{BOX_V}")
-        print(f"{BOX_BL}{BOX_H*58}{BOX_BR}")
+        buf.append(f"\n{_TOP}")
+        buf.append(_row(f" {BOLD}{MAGENTA}📄 DOCS RETRIEVED{RESET}"))
+        buf.append(_MID)
+        buf.append(_row(f"  {DIM}No docs retrieved (below threshold or fallback){RESET}"))
+        buf.append(_BOT)
+        _emit(buf)
         return
     
     iter_label = f" (iteration {iteration})" if iteration else ""
-    print(f"\n{BOX_TL}{BOX_H*58}{BOX_TR}")
-    print(f"{BOX_V} {BOLD}{MAGENTA}📄 DOCS RETRIEVED{RESET}{DIM}{iter_label}{RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}  Found {GREEN}{len(docs)}{RESET} relevant document(s)".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}{BOX_H*56}{BOX_V}")
+    buf.append(f"\n{_TOP}")
+    buf.append(_row(f" {BOLD}{MAGENTA}📄 DOCS RETRIEVED{RESET}{DIM}{iter_label}{RESET}"))
+    buf.append(_row(f"  Found {GREEN}{len(docs)}{RESET} relevant document(s)"))
+    buf.append(_MID)
     
     for i, doc in enumerate(docs[:5], 1):  # Show top 5
-        title = getattr(doc, 'title', 'Unknown')[:45]
-        score = getattr(doc, 'relevance_score', 0)
-        source = getattr(doc, 'source_type', 'docs')
-        content = getattr(doc, 'content', '')[:120].replace('\n', ' ')
+        try:
+            title, score, source, content = _DOC_FIELDS(doc)
+        except AttributeError:  # not a RetrievedDocument; fall back per field
+            title = getattr(doc, 'title', 'Unknown')
+            score = getattr(doc, 'relevance_score', 0)
+            source = getattr(doc, 'source_type', 'docs')
+            content = getattr(doc, 'content', '')
+        title = title[:45]
+        content = content[:120].replace('\n', ' ')
         
         source_icon = "📖" if source == "docs" else "💻"
         score_color = GREEN if score >= 0.7 else YELLOW if score >= 0.4 else RED
         
-        print(f"{BOX_V}  {source_icon} [{i}] {title}".ljust(58) + f"{BOX_V}")
-        print(f"{BOX_V}     Score: {score_color}{score:.2%}{RESET}  |  Type: {source}".ljust(58) + f"{BOX_V}")
-        print(f"{BOX_V}     {DIM}«{content}...»{RESET}".ljust(58) + f"{BOX_V}")
+        buf.append(_row(f"  {source_icon} [{i}] {title}"))
+        buf.append(_row(f"     Score: {score_color}{score:.2%}{RESET}  |  Type: {source}"))
+        buf.append(_row(f"     {DIM}«{content}...»{RESET}"))
         if i < len(docs) and i < 5:
-            print(f"{BOX_V}  {DIM}{'─'*50}{RESET}".ljust(58) + f"{BOX_V}")
+            buf.append(_row(f"  {DIM}{'─'*50}{RESET}"))
     
     if len(docs) > 5:
-        print(f"{BOX_V}  {DIM}... and {len(docs) - 5} more document(s){RESET}".ljust(58) + f"{BOX_V}")
+        buf.append(_row(f"  {DIM}... and {len(docs) - 5} more document(s){RESET}"))
     
-    print(f"{BOX_BL}{BOX_H*58}{BOX_BR}")
+    buf.append(_BOT)
+    _emit(buf)
 
 
 # ── pretty decision printer ───────────────────────────────────────────────
 def print_decision(intent: str, urgency: str, confidence: float, 
                    should_escalate: bool = False, escalation_reason: str = None):
     """Pretty print agent decision."""
+    if not _TTY:
+        escalation = f" escalate=yes ({escalation_reason or 'no reason'})" if should_escalate else ""
+        print(f"[DECISION] intent={intent} urgency={urgency} confidence={confidence:.0%}{escalation}")
+        return
+    buf = []
     conf_color = GREEN if confidence >= 0.7 else YELLOW if confidence >= 0.4 else RED
     
-    print(f"\n{BOX_TL}{BOX_H*58}{BOX_TR}")
-    print(f"{BOX_V} {BOLD}{CYAN}🧠 AGENT DECISION{RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}{BOX_H*56}{BOX_V}")
-    print(f"{BOX_V}  Intent:    {BOLD}{intent}{RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}  Urgency:   {BOLD}{urgency}{RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}  Confidence: {conf_color}{confidence:.0%}{RESET}".ljust(58) + f"{BOX_V}")
+    buf.append(f"\n{_TOP}")
+    buf.append(_row(f" {BOLD}{CYAN}🧠 AGENT DECISION{RESET}"))
+    buf.append(_MID)
+    buf.append(_row(f"  Intent:    {BOLD}{intent}{RESET}"))
+    buf.append(_row(f"  Urgency:   {BOLD}{urgency}{RESET}"))
+    buf.append(_row(f"  Confidence: {conf_color}{confidence:.0%}{RESET}"))
     
     if should_escalate:
-        print(f"{BOX_V}  {RED}⚠ ESCALATION TRIGGERED{RESET}".ljust(58) + f"{BOX_V}")
+        buf.append(_row(f"  {RED}⚠ ESCALATION TRIGGERED{RESET}"))
         if escalation_reason:
-            reason_text = textwrap.fill(f"Reason: {escalation_reason}", 48)
-            for line in reason_text.split('\n'):
-                print(f"{BOX_V}    {line}".ljust(58) + f"{BOX_V}")
+            for line in _WRAP_48.wrap(f"Reason: {escalation_reason}"):
+                buf.append(_row(f"    {line}"))
     
-    print(f"{BOX_BL}{BOX_H*58}{BOX_BR}")
+    buf.append(_BOT)
+    _emit(buf)
 
 
 # ── pretty final result printer ───────────────────────────────────────────
@@ -154,39 +256,46 @@ def print_final_result(response: str, latency: float, docs_count: int,
                        confidence: float, 
                        clarification_questions: List[str] = None):
     """Pretty print final result with latency."""
+    if not _TTY:
+        if response:
+            print(f"[RESPONSE] {response}")
+        for i, q in enumerate(clarification_questions or (), 1):
+            print(f"[CLARIFY {i}] {q}")
+        print(f"[PERF] latency={latency:.2f}s docs={docs_count} confidence={confidence:.0%}")
+        return
+    buf = []
     conf_color = GREEN if confidence >= 0.7 else YELLOW if confidence >= 0.4 else RED
     section_header("FINAL RESULT")
     
     # Response
     if response:
-        wrapped = textwrap.fill(response, 54)
-        lines = wrapped.split('\n')
-        print(f"{BOX_TL}{BOX_H*58}{BOX_TR}")
-        print(f"{BOX_V} {BOLD}{GREEN}💬 RESPONSE{RESET}".ljust(58) + f"{BOX_V}")
-        print(f"{BOX_V}{BOX_H*56}{BOX_V}")
+        lines = _WRAP_54.wrap(response) or [""]
+        buf.append(_TOP)
+        buf.append(_row(f" {BOLD}{GREEN}💬 RESPONSE{RESET}"))
+        buf.append(_MID)
         for line in lines:
-            print(f"{BOX_V}  {line}".ljust(58) + f"{BOX_V}")
-        print(f"{BOX_BL}{BOX_H*58}{BOX_BR}")
+            buf.append(_row(f"  {line}"))
+        buf.append(_BOT)
     
     # Clarification questions
     if clarification_questions:
-        print(f"\n{BOX_TL}{BOX_H*58}{BOX_TR}")
-        print(f"{BOX_V} {BOLD}{YELLOW}❓ CLARIFICATION NEEDED{RESET}".ljust(58) + f"{BOX_V}")
-        print(f"{BOX_V}{BOX_H*56}{BOX_V}")
+        buf.append(f"\n{_TOP}")
+        buf.append(_row(f" {BOLD}{YELLOW}❓ CLARIFICATION NEEDED{RESET}"))
+        buf.append(_MID)
         for i, q in enumerate(clarification_questions, 1):
-            q_text = textwrap.fill(f"{i}. {q}", 52)
-            for line in q_text.split('\n'):
-                print(f"{BOX_V}  {line}".ljust(58) + f"{BOX_V}")
-        print(f"{BOX_BL}{BOX_H*58}{BOX_BR}")
+            for line in _WRAP_52.wrap(f"{i}. {q}") or [""]:
+                buf.append(_row(f"  {line}"))
+        buf.append(_BOT)
     
     # Latency and stats
-    print(f"\n{BOX_TL}{BOX_H*58}{BOX_TR}")
-    print(f"{BOX_V} {BOLD}{WHITE}⏱ PERFORMANCE{RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}{BOX_H*56}{BOX_V}")
-    print(f"{BOX_V}  Total Latency:    {GREEN}{latency:.2f}s{RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}  Docs Retrieved:   {CYAN}{docs_count}{RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_V}  Final Confidence: {conf_color}{confidence:.0%}{RESET}".ljust(58) + f"{BOX_V}")
-    print(f"{BOX_BL}{BOX_H*58}{BOX_BR}")
+    buf.append(f"\n{_TOP}")
+    buf.append(_row(f" {BOLD}{WHITE}⏱ PERFORMANCE{RESET}"))
+    buf.append(_MID)
+    buf.append(_row(f"  Total Latency:    {GREEN}{latency:.2f}s{RESET}"))
+    buf.append(_row(f"  Docs Retrieved:   {CYAN}{docs_count}{RESET}"))
+    buf.append(_row(f"  Final Confidence: {conf_color}{confidence:.0%}{RESET}"))
+    buf.append(_BOT)
+    _emit(buf)
 
 
 # ── preset scenarios ───────────────────────────────────────────────────────
@@ -209,6 +318,7 @@ SCENARIOS = {
         "I found a critical bug in the CDC pipeline. Data is being lost silently.",
     ],
 }
+_SCENARIO_NAMES = tuple(SCENARIOS)
 
 # ── build a fake Slack event ───────────────────────────────────────────────
 def make_event(
@@ -233,6 +343,10 @@ def make_event(
         },
     }
 
+# Nodes that hold a module-level slack_client to swap for the fake
+_SLACK_NODES = ("context_builder", "solution_provider", "escalation_handler", "clarification_asker")
+
+
 def _patch_slack_for_local_testing():
     """
     Replace the live SlackClient with a local mock so API calls don't fail.
@@ -286,18 +400,10 @@ def _patch_slack_for_local_testing():
         fake = _FakeSlackClient()
         sc_module.create_slack_client = lambda *a, **kw: fake
 
-        import agent.nodes.context_builder as cb
-        if hasattr(cb, "slack_client"):
-            cb.slack_client = fake
-        import agent.nodes.solution_provider as sp
-        if hasattr(sp, "slack_client"):
-            sp.slack_client = fake
-        import agent.nodes.escalation_handler as eh
-        if hasattr(eh, "slack_client"):
-            eh.slack_client = fake
-        import agent.nodes.clarification_asker as ca
-        if hasattr(ca, "slack_client"):
-            ca.slack_client = fake
+        for node in _SLACK_NODES:
+            module = importlib.import_module(f"agent.nodes.{node}")
+            if hasattr(module, "slack_client"):
+                module.slack_client = fake
 
         info("Slack client patched for local testing ✓")
     except Exception as e:
@@ -317,9 +423,11 @@ def run_message(
     event = make_event(text, user_id, channel_id, thread_ts)
     state = create_initial_state(event)
 
-    start = time.time()
+    # Monotonic, high-resolution clock: unaffected by NTP/wall-clock jumps
+    perf_counter = time.perf_counter
+    start = perf_counter()
     result = graph.invoke(state)
-    elapsed = time.time() - start
+    elapsed = perf_counter() - start
 
     return {"state": result, "elapsed": elapsed}
 
@@ -370,16 +478,155 @@ def print_result(result: dict, iteration: int = None):
     )
 
 
+# ── warm-up ───────────────────────────────────────────────────────────────
+def _warm_up():
+    """
+    Pay one-time costs before the first message so its latency is comparable
+    to the rest: import the LLM provider SDK (heavy, imported lazily per call)
+    and open the pooled RAG HTTP connection. Deliberately doesn't invoke the
+    graph — that would spend an LLM call and write to persistence.
+    """
+    try:
+        from agent.config import Config
+        if Config.LLM_PROVIDER.lower() == "gemini":
+            import google.genai  # noqa: F401
+        else:
+            import openai  # noqa: F401
+    except Exception as e:
+        warn(f"LLM SDK warm-up skipped: {e}")
+
+    try:
+        from agent import rag_client
+        if rag_client.is_available():
+            info("RAG service connection warmed ✓")
+        else:
+            warn("RAG service not ready — first retrieval may be slow or fall back")
+    except Exception as e:
+        warn(f"RAG warm-up skipped: {e}")
+
+
+# ── scenario batches ──────────────────────────────────────────────────────
+class _ThreadRoutedStdout:
+    """
+    sys.stdout stand-in for parallel scenario runs: writes from a thread with
+    a capture buffer (box printers, the fake Slack client) land in that
+    buffer; every other write goes straight to the real stream.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def capture(self) -> io.StringIO:
+        self._local.buf = io.StringIO()
+        return self._local.buf
+
+    def release(self) -> None:
+        self._local.buf = None
+
+    def write(self, text: str) -> int:
+        buf = getattr(self._local, "buf", None)
+        return (self._stream if buf is None else buf).write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def run_scenario(name: str, user_id: str, channel_id: str, thread_ts: str, graph) -> None:
+    """Run and print one scenario's messages in order (they share a thread, so never concurrently)."""
+    header(f"Scenario: {name} ({len(SCENARIOS[name])} message(s))")
+    for i, msg in enumerate(SCENARIOS[name], 1):
+        user_msg(msg)
+        print_result(run_message(msg, user_id, channel_id, thread_ts, graph), iteration=i)
+
+
+def _run_scenario_captured(router: _ThreadRoutedStdout, name: str, *args) -> tuple:
+    """run_scenario on a worker thread; returns (ok, transcript)."""
+    buf = router.capture()
+    ok = True
+    try:
+        run_scenario(name, *args)
+    except Exception as e:
+        error(f"Scenario {name} failed: {e}")
+        ok = False
+    finally:
+        router.release()
+    return ok, buf.getvalue()
+
+
+def run_all_scenarios(user_id: str, channel_id: str, graph, parallel: int = 1):
+    """
+    Run every preset scenario, each as its own Slack thread.
+
+    With parallel > 1, independent scenarios run concurrently on a thread
+    pool (each turn is dominated by LLM/RAG I/O). Each scenario's output is
+    buffered and printed whole when it finishes, so transcripts never
+    interleave. Sharing the graph is safe: it is compiled without a
+    checkpointer, so every invoke carries its own state, and persistence
+    opens a fresh SQLite connection per call (initialized up front here).
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    base_ts = time.time()
+    thread_ts = {name: f"{base_ts + i / 1000:.6f}" for i, name in enumerate(SCENARIOS)}
+    workers = max(1, min(parallel, len(SCENARIOS)))
+    info(f"Running {len(SCENARIOS)} scenarios ({workers} at a time)")
+
+    failed = 0
+    if workers == 1:
+        for name in SCENARIOS:
+            try:
+                run_scenario(name, user_id, channel_id, thread_ts[name], graph)
+            except Exception as e:
+                error(f"Scenario {name} failed: {e}")
+                failed += 1
+    else:
+        from agent.persistence import get_database
+        get_database()  # create the shared instance before workers race to
+
+        router = _ThreadRoutedStdout(sys.stdout)
+        sys.stdout = router
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_run_scenario_captured, router, name, user_id, channel_id, thread_ts[name], graph)
+                    for name in SCENARIOS
+                ]
+                for future in as_completed(futures):
+                    ok, transcript = future.result()
+                    router.write(transcript)
+                    router.flush()
+                    failed += not ok
+        finally:
+            sys.stdout = router._stream
+
+    separator()
+    if failed:
+        warn(f"{failed} scenario(s) failed")
+    else:
+        success("All scenarios complete!")
+
+
 # ── main ──────────────────────────────────────────────────────────────────
 def main():
     parser = argparse.ArgumentParser(description="OLake Agent local test harness")
     parser.add_argument("--message", "-m", help="Single message to send")
     parser.add_argument("--user", default="U_LOCAL_TEST", help="Fake Slack user ID")
     parser.add_argument("--channel", default="C_LOCAL_TEST", help="Fake Slack channel ID")
-    parser.add_argument("--scenario", "-s", choices=list(SCENARIOS.keys()),
+    parser.add_argument("--scenario", "-s", choices=_SCENARIO_NAMES + ("all",),
                         help="Run a preset multi-message scenario")
     parser.add_argument("--thread-ts", help="Reuse an existing thread TS")
+    parser.add_argument("--no-color", action="store_true",
+                        help="Keep the boxes but drop ANSI colors")
+    parser.add_argument("--parallel", "-p", type=int, default=1, metavar="N",
+                        help="With --scenario all, run up to N scenarios concurrently")
     args = parser.parse_args()
+    if args.parallel < 1:
+        parser.error("--parallel must be at least 1")
+    if args.parallel != 1 and args.scenario != "all":
+        parser.error("--parallel only applies to --scenario all")
+    if args.no_color:
+        _disable_color()
 
     header("OLake Community Agent — Local Test Harness")
 
@@ -396,19 +643,21 @@ def main():
         error(f"Failed to load graph: {e}")
         sys.exit(1)
 
+    _warm_up()
+
     # Shared thread timestamp for this session
     thread_ts = args.thread_ts or f"{time.time():.6f}"
     info(f"Thread TS: {thread_ts}  |  User: {args.user}  |  Channel: {args.channel}")
 
     try:
+        # ── all scenarios (each in its own thread) ─────────────────────────────
+        if args.scenario == "all":
+            run_all_scenarios(args.user, args.channel, graph, args.parallel)
+            return
+
         # ── scenario mode ──────────────────────────────────────────────────────
         if args.scenario:
-            messages = SCENARIOS[args.scenario]
-            header(f"Scenario: {args.scenario} ({len(messages)} message(s))")
-            for i, msg in enumerate(messages, 1):
-                user_msg(msg)
-                result = run_message(msg, args.user, args.channel, thread_ts, graph)
-                print_result(result, iteration=i)
+            run_scenario(args.scenario, args.user, args.channel, thread_ts, graph)
             separator()
             success("Scenario complete!")
             return
@@ -8,6 +8,12 @@ Usage:
     # Run all tests
     python -m tests.run_all
     
+    # Run all component modules, 4 at a time
+    python -m tests.run_all --jobs 4
+    
+    # Share one interpreter across modules (default: one per module)
+    python -m tests.run_all --inprocess
+    
     # Run specific component tests
     python -m tests.run_all chunker
     python -m tests.run_all retriever
@@ -26,7 +32,7 @@ import sys
 import os
 import subprocess
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 # Test modules mapping
@@ -36,7 +42,9 @@ TEST_MODULES = {
     "embedder": "tests.unit.test_embedder",
     "indexer": "tests.unit.test_indexer",
     "config": "tests.unit.test_config",
+    "helpers": "tests.unit.test_helpers",
 }
+_TEST_NAMES_STR = ", ".join(TEST_MODULES)
 
 
 def print_header(title: str, char: str = "=") -> None:
@@ -57,39 +65,134 @@ def get_project_root() -> Path:
     return Path(__file__).parent.parent
 
 
-def run_test_module(module_name: str, args: Optional[List[str]] = None) -> int:
-    """Run a test module with optional arguments."""
+def _test_env() -> dict:
+    """Environment with project root and services/rag on PYTHONPATH."""
     project_root = get_project_root()
     rag_path = project_root / "services" / "rag"
-    
+    return {
+        **os.environ,
+        "PYTHONPATH": f"{str(project_root)}:{str(rag_path)}",
+    }
+
+
+def _build_cmd(module_name: str, args: Optional[List[str]] = None) -> List[str]:
     cmd = [
         sys.executable,
         "-m",
         module_name,
     ]
-    
     if args:
         cmd.extend(args)
+    return cmd
+
+
+def run_test_module(module_name: str, args: Optional[List[str]] = None) -> int:
+    """Run a test module with optional arguments."""
+    project_root = get_project_root()
+    cmd = _build_cmd(module_name, args)
     
     print_section(f"Running: {module_name}")
     print(f"  Command: {' '.join(cmd)}")
     print(f"  Directory: {project_root}")
     
-    # Build environment with proper PYTHONPATH
-    env = {
-        **os.environ,
-        "PYTHONPATH": f"{str(project_root)}:{str(rag_path)}",
-    }
-    
     result = subprocess.run(
         cmd,
         cwd=project_root,
-        env=env,
+        env=_test_env(),
+        check=False,
     )
     
     return result.returncode
 
 
+def run_test_modules_parallel(modules: Dict[str, str], jobs: int) -> Dict[str, int]:
+    """
+    Run test modules as concurrent subprocesses, at most `jobs` at a time.
+
+    Each module's output is captured and printed as one block, in the
+    order given, so concurrent runs don't interleave.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    project_root = get_project_root()
+    env = _test_env()
+
+    def _run(module_name: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            _build_cmd(module_name),
+            cwd=project_root,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            check=False,
+        )
+
+    print(f"\n  Running {len(modules)} modules, {jobs} at a time")
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {name: pool.submit(_run, module) for name, module in modules.items()}
+        for name, future in futures.items():
+            completed = future.result()
+            print_section(f"Output: {modules[name]}")
+            sys.stdout.write(completed.stdout.decode(errors="replace"))
+            sys.stdout.flush()
+            results[name] = completed.returncode
+    return results
+
+
+# Runs each module as __main__ in one interpreter and records exit codes
+_INPROCESS_SCRIPT = """
+import runpy, sys, traceback
+codes_path, modules = sys.argv[1], sys.argv[2:]
+codes = []
+for module in modules:
+    print(f"\\n--- Running: {module} ---", flush=True)
+    sys.argv = [module]
+    try:
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    codes.append(code)
+    sys.stdout.flush()
+with open(codes_path, "w") as f:
+    f.write(" ".join(map(str, codes)))
+"""
+
+
+def run_test_modules_inprocess(modules: Dict[str, str]) -> Dict[str, int]:
+    """
+    Run test modules one after another in a single interpreter.
+
+    Heavy shared imports (torch, transformers, qdrant-client) are paid once
+    instead of once per module. Modules share process state (env, sys.path,
+    cached models and Config), so this is opt-in via --inprocess. A module whose run can't be
+    confirmed (e.g. the interpreter crashed) counts as failed.
+    """
+    import tempfile
+
+    project_root = get_project_root()
+    print_section(f"Running {len(modules)} modules in one interpreter")
+    with tempfile.TemporaryDirectory() as tmp:
+        codes_path = os.path.join(tmp, "codes")
+        subprocess.run(
+            [sys.executable, "-c", _INPROCESS_SCRIPT, codes_path, *modules.values()],
+            cwd=project_root,
+            env=_test_env(),
+            check=False,
+        )
+        try:
+            with open(codes_path) as f:
+                codes = [int(c) for c in f.read().split()]
+        except (OSError, ValueError):
+            codes = []
+    codes += [1] * (len(modules) - len(codes))
+    return dict(zip(modules, codes))
+
+
 def list_tests() -> None:
     """List all available test modules."""
     print_header("AVAILABLE TESTS")
@@ -107,8 +210,11 @@ def list_tests() -> None:
     print("    python -m tests.run_all --list             # Show this help")
 
 
-def run_all_tests() -> int:
-    """Run all test modules."""
+def run_all_tests(jobs: int = 1, inprocess: bool = False) -> int:
+    """
+    Run all test modules: concurrently when jobs > 1, in one shared
+    interpreter when inprocess, otherwise one subprocess per module.
+    """
     print_header("RAG UNIT TESTS - FULL SUITE")
     
     project_root = get_project_root()
@@ -118,9 +224,14 @@ def run_all_tests() -> int:
     
     results = {}
     
-    for name, module in TEST_MODULES.items():
-        returncode = run_test_module(module)
-        results[name] = returncode
+    if jobs > 1:
+        results = run_test_modules_parallel(TEST_MODULES, jobs)
+    elif inprocess:
+        results = run_test_modules_inprocess(TEST_MODULES)
+    else:
+        for name, module in TEST_MODULES.items():
+            returncode = run_test_module(module)
+            results[name] = returncode
     
     # Summary
     print_header("TEST SUMMARY")
@@ -159,6 +270,8 @@ Examples:
   python -m tests.run_all                     # Run all tests
   python -m tests.run_all chunker             # Run chunker tests
   python -m tests.run_all retriever config    # Run multiple components
+  python -m tests.run_all -j 5                # Run all components concurrently
+  python -m tests.run_all --inprocess         # Share one interpreter across modules
   python -m tests.run_all --list              # List available tests
         """
     )
@@ -189,6 +302,21 @@ Examples:
         help="Arguments to pass to test file"
     )
     
+    # Concurrent subprocesses and one shared interpreter are alternative modes
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="Run up to N test modules concurrently (output is shown per module when done)"
+    )
+    
+    mode.add_argument(
+        "--inprocess",
+        action="store_true",
+        help="Run all test modules in one shared interpreter (default: one per module)"
+    )
+    
     args = parser.parse_args()
     
     # Change to project root
@@ -211,11 +339,18 @@ Examples:
         for comp in args.components:
             if comp not in TEST_MODULES:
                 print(f"Error: Unknown component '{comp}'")
-                print(f"Valid components: {', '.join(TEST_MODULES.keys())}")
+                print(f"Valid components: {_TEST_NAMES_STR}")
                 return 1
     
     # Run specified components or all
     if args.components is not None and len(args.components) > 0:
+        selected = {c: TEST_MODULES[c] for c in dict.fromkeys(args.components)}
+        if args.jobs > 1:
+            results = list(run_test_modules_parallel(selected, args.jobs).values())
+            return 0 if all(r == 0 for r in results) else 1
+        if args.inprocess:
+            results = list(run_test_modules_inprocess(selected).values())
+            return 0 if all(r == 0 for r in results) else 1
         results = []
         for component in args.components:
             module = TEST_MODULES[component]
@@ -224,7 +359,7 @@ Examples:
         return 0 if all(r == 0 for r in results) else 1
     else:
         # No components specified, run all
-        return run_all_tests()
+        return run_all_tests(jobs=args.jobs, inprocess=args.inprocess)
 
 
 if __name__ == "__main__":
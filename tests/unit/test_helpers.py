@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Helper Unit Tests with CLI Output
+
+Covers the pure functions behind retrieval and ingestion: RRF fusion, the
+query/collection-info caches, chunk screening, embedding validation and
+point IDs. None of them need the embedding model, so when torch is not
+installed `embedder` is replaced by a stub for the duration of the imports.
+
+Usage:
+    python -m tests.unit.test_helpers               # Run all tests
+    python -m tests.unit.test_helpers --rrf         # RRF fusion ordering
+    python -m tests.unit.test_helpers --cache       # Query cache keys, LRU and TTL
+    python -m tests.unit.test_helpers --filter      # ChunkFilter counts
+    python -m tests.unit.test_helpers --validate    # validate_embedding edge cases
+    python -m tests.unit.test_helpers --point-id    # point_id stability
+    python -m tests.unit.test_helpers --etag        # Collection info cache / ETags
+"""
+
+import sys
+import os
+import time
+import types
+import uuid
+from pathlib import Path
+
+# Add paths for imports - works from project root or tests directory
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+RAG_PATH = PROJECT_ROOT / "services" / "rag"
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(RAG_PATH))
+
+import numpy as np
+
+try:
+    import embedder  # noqa: F401
+    _STUBBED = False
+except ImportError:
+    # Only the names imported at module level by retriever/indexer/server
+    _stub = types.ModuleType("embedder")
+    _stub.vector_size = lambda: 768
+    _stub.embed_queries = _stub.embed_documents = lambda *a, **kw: []
+    _stub.is_ready = lambda: False
+    sys.modules["embedder"] = _stub
+    _STUBBED = True
+
+from qdrant_client.models import FieldCondition, Filter, MatchValue
+
+from config import Config
+from indexer import point_id
+from ingest_utils import ChunkFilter, validate_embedding
+from query_cache import LRUTTLCache, QueryCache
+from retriever import SearchResult, _rrf_merge
+
+try:
+    import server
+except ImportError:
+    server = None
+
+if _STUBBED:
+    # Don't leak the stub to other modules sharing this interpreter (--inprocess)
+    for _name in ("embedder", "retriever", "indexer", "server"):
+        sys.modules.pop(_name, None)
+
+
+def print_header(title: str) -> None:
+    """Print a formatted header."""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def print_section(title: str) -> None:
+    """Print a formatted section title."""
+    print(f"\n--- {title} ---")
+
+
+def _result(chunk_id: str, score: float) -> SearchResult:
+    return SearchResult({"chunk_id": chunk_id, "text": chunk_id}, score, "docs")
+
+
+def _reference_rrf(result_lists, top_k: int, rrf_k: int):
+    """The original dict-based merge: sum 1/(rrf_k + rank), keep the best-scoring hit."""
+    fused = {}
+    best = {}
+    for results in result_lists:
+        for rank, r in enumerate(results, start=1):
+            fused[r.chunk_id] = fused.get(r.chunk_id, 0.0) + 1.0 / (rrf_k + rank)
+            if r.chunk_id not in best or r.score > best[r.chunk_id].score:
+                best[r.chunk_id] = r
+    order = sorted(fused, key=lambda c: fused[c], reverse=True)[:top_k]
+    return [best[c] for c in order]
+
+
+def test_rrf_merge() -> None:
+    """Check _rrf_merge against the dict-based reference."""
+    print_header("RRF FUSION")
+
+    print_section("Single list is the identity")
+    single = [_result(f"c{i}", 1.0 - i / 10) for i in range(5)]
+    merged = _rrf_merge([single], top_k=3)
+    assert [r.chunk_id for r in merged] == ["c0", "c1", "c2"]
+    print("  ✓ One result list is truncated to top_k unchanged")
+
+    print_section("Empty lists")
+    assert _rrf_merge([[], []], top_k=5) == []
+    print("  ✓ No results fuse to an empty list")
+
+    print_section("Hand-checked overlap")
+    a = [_result("x", 0.9), _result("y", 0.8), _result("z", 0.7)]
+    b = [_result("y", 0.85), _result("w", 0.6), _result("x", 0.5)]
+    merged = _rrf_merge([a, b], top_k=10, rrf_k=60)
+    ids = [r.chunk_id for r in merged]
+    # y: 1/62 + 1/61 > x: 1/61 + 1/63 > w: 1/62 > z: 1/63
+    assert ids == ["y", "x", "w", "z"], ids
+    assert next(r for r in merged if r.chunk_id == "y").score == 0.85
+    print(f"  ✓ Order {ids}; duplicates keep their best cosine score")
+
+    print_section("Randomised comparison with the dict-based merge")
+    rng = np.random.default_rng(0)
+    for trial in range(200):
+        n_lists = int(rng.integers(2, 5))
+        pool = [f"c{i}" for i in range(int(rng.integers(1, 30)))]
+        lists = []
+        for _ in range(n_lists):
+            size = int(rng.integers(0, len(pool) + 1))
+            picked = rng.choice(pool, size=size, replace=False)
+            lists.append([_result(str(c), float(rng.random())) for c in picked])
+        top_k = int(rng.integers(1, 15))
+        got = _rrf_merge(lists, top_k=top_k, rrf_k=Config.RRF_K)
+        want = _reference_rrf(lists, top_k=top_k, rrf_k=Config.RRF_K)
+        got_ids = [r.chunk_id for r in got]
+        want_ids = [r.chunk_id for r in want]
+        assert got_ids == want_ids, f"trial {trial}: {got_ids} != {want_ids}"
+        assert [r.score for r in got] == [r.score for r in want], f"trial {trial}: scores differ"
+    print("  ✓ 200 random merges match the reference order and scores")
+
+
+def test_query_cache() -> None:
+    """Check QueryCache keys, copying, LRU eviction and TTL expiry."""
+    print_header("QUERY CACHE")
+
+    print_section("make_key")
+    f_pg = Filter(must=[FieldCondition(key="connector", match=MatchValue(value="postgres"))])
+    f_my = Filter(must=[FieldCondition(key="connector", match=MatchValue(value="mysql"))])
+    key = QueryCache.make_key("docs", ["cdc setup"], 5, f_pg)
+    assert key == QueryCache.make_key("docs", ["cdc setup"], 5, f_pg)
+    assert key != QueryCache.make_key("docs", ["cdc setup"], 6, f_pg)
+    assert key != QueryCache.make_key("docs", ["cdc setup"], 5, f_my)
+    assert key != QueryCache.make_key("docs", ["cdc setup"], 5, None)
+    assert key != QueryCache.make_key("code", ["cdc setup"], 5, f_pg)
+    assert key != QueryCache.make_key("docs", ["cdc", "setup"], 5, f_pg)
+    print("  ✓ Identical searches share a key")
+    print("  ✓ top_k, filter, collection and query split all change the key")
+
+    print_section("Values are copied in and out")
+    cache = QueryCache(max_size=4, ttl=60)
+    stored = [_result("a", 0.5)]
+    cache.put(key, stored)
+    stored[0].score = 0.0
+    first = cache.get(key)
+    assert first[0].score == 0.5
+    first[0].score = 0.1
+    assert cache.get(key)[0].score == 0.5
+    print("  ✓ Mutating results before or after caching leaves the entry intact")
+
+    print_section("LRU eviction")
+    lru = LRUTTLCache(max_size=2, ttl=60)
+    lru.put(b"a", 1)
+    lru.put(b"b", 2)
+    assert lru.get(b"a") == 1          # a is now most recent
+    lru.put(b"c", 3)
+    assert lru.get(b"b") is None
+    assert lru.get(b"a") == 1 and lru.get(b"c") == 3
+    print("  ✓ Least recently used entry is evicted beyond max_size")
+
+    print_section("TTL expiry and disabled cache")
+    short = LRUTTLCache(max_size=2, ttl=0.05)
+    short.put(b"a", 1)
+    assert short.get(b"a") == 1
+    time.sleep(0.1)
+    assert short.get(b"a") is None
+    assert short.stats()["size"] == 0
+    disabled = LRUTTLCache(max_size=0, ttl=60)
+    disabled.put(b"a", 1)
+    assert not disabled.enabled and disabled.get(b"a") is None
+    print("  ✓ Expired entries are dropped on read; size 0 disables the cache")
+
+
+def test_chunk_filter() -> None:
+    """Check ChunkFilter short/duplicate counting."""
+    print_header("CHUNK FILTER")
+
+    def chunk(chunk_id: str, text: str):
+        return types.SimpleNamespace(chunk_id=chunk_id, text=text)
+
+    print_section("Default (no minimum length)")
+    cf = ChunkFilter(min_chars=0)
+    texts = ["alpha", "  ", "alpha", "beta", "alpha"]
+    accepted = [cf.accept(chunk(f"c{i}", t)) for i, t in enumerate(texts)]
+    assert accepted == [True] * 5
+    assert (cf.short, cf.duplicates) == (0, 2), (cf.short, cf.duplicates)
+    print(f"  ✓ Everything accepted; {cf.summary()}")
+
+    print_section("With INGEST_MIN_CHUNK_CHARS")
+    cf = ChunkFilter(min_chars=5)
+    texts = ["tiny", "   long enough   ", "  abc  ", "long enough", "long enough"]
+    accepted = [cf.accept(chunk(f"c{i}", t)) for i, t in enumerate(texts)]
+    assert accepted == [False, True, False, True, True]
+    # Duplicates are exact-text: the padded copy is a different text
+    assert (cf.short, cf.duplicates) == (2, 1), (cf.short, cf.duplicates)
+    print(f"  ✓ Short chunks skipped on stripped length; {cf.summary()}")
+
+
+def test_validate_embedding() -> None:
+    """Check validate_embedding edge cases."""
+    print_header("VALIDATE EMBEDDING")
+
+    dim = 8
+    cases = [
+        ("valid list", [0.1] * dim, True),
+        ("valid ndarray", np.ones(dim, dtype=np.float32), True),
+        ("all zeros", [0.0] * dim, True),
+        ("None", None, False),
+        ("empty", [], False),
+        ("wrong dimension", [0.1] * (dim - 1), False),
+        ("nested", [[0.1] * dim], False),
+        ("ragged", [[0.1], [0.1, 0.2]], False),
+        ("NaN", [0.1] * (dim - 1) + [float("nan")], False),
+        ("Inf", [float("-inf")] + [0.1] * (dim - 1), False),
+        ("non-numeric", ["a"] * dim, False),
+    ]
+    for label, vector, expected in cases:
+        ok, err = validate_embedding(vector, dim)
+        assert ok is expected, f"{label}: got ({ok}, {err!r})"
+        assert bool(err) is not expected, f"{label}: error message {err!r}"
+        print(f"  ✓ {label:<16} → {'valid' if ok else err}")
+
+    ok, err = validate_embedding([0.1, float("nan"), 0.1, 0.1], 4)
+    assert not ok and "index 1" in err, err
+    print("  ✓ Reports the index of the first non-finite value")
+
+
+def test_point_id() -> None:
+    """Check point_id is deterministic and a valid UUID."""
+    print_header("POINT IDS")
+
+    chunk_ids = ["docs/postgres#setup", "docs/postgres#setup-1", "", "ünïcode §4.1.3"]
+    ids = [point_id(c) for c in chunk_ids]
+    assert ids == [point_id(c) for c in chunk_ids]
+    assert len(set(ids)) == len(ids)
+    for pid in ids:
+        assert str(uuid.UUID(pid)) == pid
+    print("  ✓ Same chunk_id → same ID; distinct chunk_ids → distinct IDs")
+    print("  ✓ IDs are canonical UUID strings")
+
+    # Pinned so a change of scheme is caught before it orphans stored points
+    assert point_id("docs/postgres#setup") == "54700085-c1ca-935a-8626-6d4e80fe0b2c"
+    print("  ✓ Known chunk_id maps to its stored ID")
+
+
+def test_collection_info_cache() -> None:
+    """Check the server's collection info cache and ETag handling."""
+    print_header("COLLECTION INFO CACHE")
+
+    if server is None:
+        print("\n  ⚠ Skipped: server dependencies (fastapi/fastmcp) not installed")
+        return
+
+    calls = []
+
+    def load(name):
+        calls.append(name)
+        return {"name": name, "points": 3}
+
+    server._invalidate_collection_info()
+    key = ("stats", "docs")
+    assert server._cached_collection_info(key) is None
+    value, etag = server._load_collection_info(key, load, "docs")
+    assert server._cached_collection_info(key) == (value, etag)
+    assert etag.startswith('W/"')
+    _, etag_again = server._load_collection_info(key, lambda n: {"points": 3, "name": n}, "docs")
+    assert etag_again == etag
+    print("  ✓ Cached until invalidated; ETag depends on content, not key order")
+
+    _, etag_changed = server._load_collection_info(key, lambda n: {"name": n, "points": 4}, "docs")
+    assert etag_changed != etag
+    server._invalidate_collection_info()
+    assert server._cached_collection_info(key) is None
+    print("  ✓ Changed content gets a new ETag; invalidation empties the cache")
+
+    class _Req:
+        def __init__(self, headers):
+            self.headers = headers
+
+    hit = server._etag_response(_Req({"if-none-match": etag}), value, etag)
+    miss = server._etag_response(_Req({}), value, etag)
+    assert hit.status_code == 304 and not hit.body
+    assert miss.status_code == 200 and miss.headers["etag"] == etag
+    print("  ✓ Matching If-None-Match → 304 without a body")
+
+
+def run_all_tests() -> None:
+    """Run all helper tests."""
+    print_header("HELPER UNIT TESTS")
+
+    test_rrf_merge()
+    test_query_cache()
+    test_chunk_filter()
+    test_validate_embedding()
+    test_point_id()
+    test_collection_info_cache()
+
+    print_header("ALL TESTS COMPLETE")
+    print("\n  All helper tests finished.\n")
+
+
+def main():
+    """Main entry point with CLI argument handling."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Helper Unit Tests",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python -m tests.unit.test_helpers               # Run all tests
+  python -m tests.unit.test_helpers --rrf         # RRF fusion ordering
+  python -m tests.unit.test_helpers --validate    # validate_embedding edge cases
+        """
+    )
+
+    parser.add_argument("--rrf", action="store_true",
+                        help="Test RRF fusion against the dict-based merge")
+    parser.add_argument("--cache", action="store_true",
+                        help="Test query cache keys, LRU and TTL")
+    parser.add_argument("--filter", action="store_true",
+                        help="Test ChunkFilter counts")
+    parser.add_argument("--validate", action="store_true",
+                        help="Test validate_embedding edge cases")
+    parser.add_argument("--point-id", action="store_true",
+                        help="Test point_id stability")
+    parser.add_argument("--etag", action="store_true",
+                        help="Test the collection info cache and ETags")
+
+    args = parser.parse_args()
+
+    # Change to project root
+    os.chdir(Path(__file__).parent.parent.parent)
+
+    # Run specific tests based on arguments
+    if args.rrf:
+        test_rrf_merge()
+    elif args.cache:
+        test_query_cache()
+    elif args.filter:
+        test_chunk_filter()
+    elif args.validate:
+        test_validate_embedding()
+    elif args.point_id:
+        test_point_id()
+    elif args.etag:
+        test_collection_info_cache()
+    else:
+        # No specific test requested, run all
+        run_all_tests()
+
+
+if __name__ == "__main__":
+    main()